@@ -13,7 +13,7 @@ class WatermarkAlgorithm:
         raise NotImplementedError
     
     def extract_watermark(self, watermarked_image: np.ndarray, original_shape: Tuple[int, int]) -> np.ndarray:
-         """
+        """
         提取水印
         """
         raise NotImplementedError
@@ -47,60 +47,110 @@ class WatermarkAlgorithm:
 class LSBWatermark(WatermarkAlgorithm):
     """
     LSB 水印算法
+    bits: 使用的低位平面数 (1~8)，水印像素的高 bits 位写入宿主像素的低 bits 位
+    color: 为 True 时彩色宿主图像的三个通道都嵌入水印，否则先转为灰度图
     """
-    def __init__(self, bits: int = 1):
+    def __init__(self, bits: int = 1, color: bool = False):
+        if not 1 <= bits <= 8:
+            raise ValueError("bits 取值范围为 1~8")
         self.bits = bits
+        self.color = color
+
+    def _prepare(self, image: np.ndarray) -> np.ndarray:
+        # 非彩色模式下与原实现一致，先转为灰度图
+        if len(image.shape) == 3 and not self.color:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        return image
 
     def embed_watermark(self, host_image: np.ndarray, watermark: np.ndarray) -> np.ndarray:
         """
         嵌入水印
         """
-        # 确保图像为灰度图
-        if len(host_image.shape) == 3:
-            host_image = cv2.cvtColor(host_image, cv2.COLOR_RGB2GRAY)
-        if len(watermark.shape) == 3:
+        host_image = self._prepare(host_image)
+        if len(watermark.shape) == 3 and len(host_image.shape) == 2:
             watermark = cv2.cvtColor(watermark, cv2.COLOR_RGB2GRAY)
 
-        height, width = host_image.shape
-        wm_height, wm_width = watermark.shape
+        height, width = host_image.shape[:2]
+        wm_height, wm_width = watermark.shape[:2]
 
         if wm_height > height or wm_width > width:
             raise ValueError("水印尺寸过大")
 
+        # 灰度水印嵌入彩色宿主时三个通道写入相同的水印
+        if len(host_image.shape) == 3 and len(watermark.shape) == 2:
+            watermark = watermark[:, :, np.newaxis]
+
+        # 整块做位运算：清空宿主像素的低 bits 位，再放入水印像素的高 bits 位
+        keep_mask = (0xFF << self.bits) & 0xFF
         watermarked_image = host_image.copy()
+        region = watermarked_image[:wm_height, :wm_width]
+        region &= keep_mask
+        region |= watermark.astype(np.uint8, copy=False) >> (8 - self.bits)
 
-        for i in range(wm_height):
-            for j in range(wm_width):
-                # 将水印像素值嵌入到宿主图像的 LSB
-                watermarked_image[i, j] = (watermarked_image[i, j] & (255 << self.bits)) | (watermark[i, j] >> (8 - self.bits))
-                
         return watermarked_image
 
     def extract_watermark(self, watermarked_image: np.ndarray, watermark_shape: Tuple[int, int]) -> np.ndarray:
         """
         提取水印
+        watermark_shape 为二维时，彩色图像三个通道的提取结果按位多数表决合并为一幅灰度水印
         """
-        # 确保图像为灰度图
-        if len(watermarked_image.shape) == 3:
-             watermarked_image = cv2.cvtColor(watermarked_image, cv2.COLOR_RGB2GRAY)
-        
-        wm_height, wm_width = watermark_shape
-        extracted_watermark = np.zeros(watermark_shape, dtype=np.uint8)
+        watermarked_image = self._prepare(watermarked_image)
+
+        wm_height, wm_width = watermark_shape[:2]
+        region = watermarked_image[:wm_height, :wm_width]
+        extracted_watermark = (region & ((1 << self.bits) - 1)) << (8 - self.bits)
+
+        if len(extracted_watermark.shape) == 3 and len(watermark_shape) == 2:
+            b, g, r = extracted_watermark[:, :, 0], extracted_watermark[:, :, 1], extracted_watermark[:, :, 2]
+            extracted_watermark = (b & g) | (b & r) | (g & r)
+
+        return extracted_watermark.astype(np.uint8, copy=False)
+
+def dct_matrix(n: int) -> np.ndarray:
+    """
+    n 点正交 DCT-II 矩阵 D：块 B 的二维 DCT 为 D @ B @ D.T，逆变换为 D.T @ C @ D (与 cv2.dct/cv2.idct 一致)
+    """
+    k = np.arange(n).reshape(-1, 1)
+    x = np.arange(n).reshape(1, -1)
+    basis = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    basis[0] /= np.sqrt(2.0)
+    return basis
 
-        for i in range(wm_height):
-            for j in range(wm_width):
-                # 提取 LSB
-                extracted_watermark[i, j] = (watermarked_image[i, j] & ((1 << self.bits) - 1)) << (8 - self.bits)
+def to_blocks(image: np.ndarray, rows: int, cols: int, block_size: int) -> np.ndarray:
+    """
+    取图像左上角 rows×cols 个块，返回 (rows, cols, block_size, block_size) 的块张量
+    """
+    region = image[:rows * block_size, :cols * block_size]
+    return region.reshape(rows, block_size, cols, block_size).swapaxes(1, 2)
 
-        return extracted_watermark
+def from_blocks(blocks: np.ndarray) -> np.ndarray:
+    """
+    to_blocks 的逆操作
+    """
+    rows, cols, block_size, _ = blocks.shape
+    return blocks.swapaxes(1, 2).reshape(rows * block_size, cols * block_size)
 
 class DCTWatermark(WatermarkAlgorithm):
     """
     DCT 水印算法
+    每个水印像素对应一个块，嵌入在该块 DCT 系数的 (2, 2) 位置；所有块的变换以批量矩阵乘法一次完成
     """
     def __init__(self, block_size: int = 8, alpha: float = 0.1):
         self.block_size = block_size
         self.alpha = alpha
+        self.basis = dct_matrix(block_size)  # 预先计算的 DCT 基
+
+    def block_dct(self, blocks: np.ndarray) -> np.ndarray:
+        """
+        对 (..., n, n) 块张量批量做二维 DCT
+        """
+        return self.basis @ blocks @ self.basis.T
+
+    def block_idct(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        对 (..., n, n) 系数张量批量做二维逆 DCT
+        """
+        return self.basis.T @ coeffs @ self.basis
 
     def embed_watermark(self, host_image: np.ndarray, watermark: np.ndarray) -> np.ndarray:
         """
@@ -118,25 +168,13 @@ class DCTWatermark(WatermarkAlgorithm):
         if wm_height > height // self.block_size or wm_width > width // self.block_size:
             raise ValueError("水印尺寸过大")
         
-        watermarked_image = host_image.copy().astype(np.float32) # 使用 float32 进行计算
-        
-        for i in range(0, height, self.block_size):
-            for j in range(0, width, self.block_size):
-                # 获取块
-                block = watermarked_image[i:i + self.block_size, j:j + self.block_size]
-                # DCT 变换
-                dct_block = cv2.dct(block)
-                
-                # 提取水印在当前块中的对应位置 (简化实现，只使用左上角低频系数)
-                wm_i = i // self.block_size
-                wm_j = j // self.block_size
-                
-                if wm_i < wm_height and wm_j < wm_width:  # 检查是否越界
-                  # 嵌入水印
-                  dct_block[2, 2] += self.alpha * watermark[wm_i, wm_j] # 在(2, 2)位置嵌入，增加鲁棒性
-                
-                # IDCT 变换
-                watermarked_image[i:i + self.block_size, j:j + self.block_size] = cv2.idct(dct_block)
+        watermarked_image = host_image.astype(np.float64)
+
+        # 只有左上角 wm_height×wm_width 个块携带水印，其余块保持原样
+        blocks = to_blocks(watermarked_image, wm_height, wm_width, self.block_size)
+        dct_blocks = self.block_dct(blocks)
+        dct_blocks[:, :, 2, 2] += self.alpha * watermark  # 在(2, 2)位置嵌入，增加鲁棒性
+        watermarked_image[:wm_height * self.block_size, :wm_width * self.block_size] = from_blocks(self.block_idct(dct_blocks))
 
         return watermarked_image.astype(np.uint8)
     
@@ -148,23 +186,12 @@ class DCTWatermark(WatermarkAlgorithm):
         if len(watermarked_image.shape) == 3:
             watermarked_image = cv2.cvtColor(watermarked_image, cv2.COLOR_RGB2GRAY)
         
-        wm_height, wm_width = watermark_shape
-        extracted_watermark = np.zeros((wm_height, wm_width), dtype=np.uint8)
-        
-        height, width = watermarked_image.shape
-        
-        for i in range(0, height, self.block_size):
-            for j in range(0, width, self.block_size):
-                
-                block = watermarked_image[i:i + self.block_size, j:j + self.block_size].astype(np.float32)
-                dct_block = cv2.dct(block)
-                
-                wm_i = i // self.block_size
-                wm_j = j // self.block_size
-                
-                if wm_i < wm_height and wm_j < wm_width:
-                    # 提取水印  (提取时需要判断是否小于等于0， 取绝对值)
-                    watermark_value = dct_block[2, 2] / self.alpha
-                    extracted_watermark[wm_i, wm_j] = int(watermark_value) # 需要取整
-                    #extracted_watermark[wm_i, wm_j] = abs(dct_block[2, 2] / self.alpha)  #尝试使用绝对值
-        return extracted_watermark
+        wm_height, wm_width = watermark_shape[:2]
+
+        # 只变换携带水印的块，且只需要 (2, 2) 系数：D[2] @ B @ D[2].T
+        blocks = to_blocks(watermarked_image.astype(np.float64), wm_height, wm_width, self.block_size)
+        row = self.basis[2]
+        coeffs = np.einsum('i,abij,j->ab', row, blocks, row)
+
+        # 取整后截断到 [0, 255]
+        return np.clip(np.trunc(coeffs / self.alpha), 0, 255).astype(np.uint8)
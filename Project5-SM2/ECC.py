@@ -0,0 +1,239 @@
+import hashlib
+import secrets
+import time
+from typing import List, Tuple, Union
+
+from SM2_new import get_naf_w
+from arith import powmod, invert
+
+# ==================== [ 通用短 Weierstrass 曲线引擎 ] ====================
+# 把 SM2_new.py 中的 w-NAF 标量乘法推广到任意 y^2 = x^3 + ax + b (mod p) 曲线：
+#   - Curve: 点加、w-NAF 标量乘、交错 w-NAF 多标量乘 (Straus)，用于 u1·G + u2·Q
+#   - GLVCurve: 利用自同态 φ(x, y) = (βx, y) = λ·(x, y)，把 k 拆成 k1 + k2·λ，
+#     k1、k2 约 128 位，倍点次数减半 (secp256k1)
+# 另提供 ECDSA 签名/验签、SEC1 压缩点与 DER 签名编解码，结果与 cryptography 库互通。
+
+Point = Tuple[int, int]
+
+class Curve:
+    def __init__(self, name: str, p: int, a: int, b: int, n: int, gx: int, gy: int):
+        self.name = name
+        self.p, self.a, self.b, self.n = p, a, b, n
+        self.G = (gx, gy)
+        self.byte_len = (p.bit_length() + 7) // 8
+        self._g_table = None
+
+    def __repr__(self) -> str:
+        return f"Curve({self.name})"
+
+    # -- 点运算 --
+    def is_on_curve(self, pt: Point) -> bool:
+        if pt is None: return True
+        x, y = pt
+        return 0 <= x < self.p and 0 <= y < self.p and (y * y - (x * x * x + self.a * x + self.b)) % self.p == 0
+
+    def neg(self, pt: Point) -> Union[Point, None]:
+        if pt is None: return None
+        return (pt[0], -pt[1] % self.p)
+
+    def add(self, p1: Point, p2: Point) -> Union[Point, None]:
+        if p1 is None: return p2
+        if p2 is None: return p1
+        p = self.p
+        x1, y1 = p1; x2, y2 = p2
+        if x1 == x2 and (y1 + y2) % p == 0: return None
+        if x1 == x2: m = (3 * x1 * x1 + self.a) * invert(2 * y1, p) % p
+        else: m = (y2 - y1) * invert(x2 - x1, p) % p
+        x3 = (m * m - x1 - x2) % p
+        y3 = (m * (x1 - x3) - y1) % p
+        return (x3, y3)
+
+    # -- 标量乘 --
+    def wnaf_table(self, pt: Point, width: int = 5) -> List[Point]:
+        """table[i] = (2i+1)·pt"""
+        table = [pt]
+        p2 = self.add(pt, pt)
+        for _ in range(1, 1 << (width - 2)):
+            table.append(self.add(table[-1], p2))
+        return table
+
+    def _g_wnaf_table(self) -> List[Point]:
+        if self._g_table is None: self._g_table = self.wnaf_table(self.G, 7)
+        return self._g_table
+
+    def _multi_wnaf(self, terms: List[Tuple[int, List[Point]]]) -> Union[Point, None]:
+        """交错 w-NAF：Σ k_i·P_i 共用一条倍点链；terms 为 (非负标量, 预计算表)"""
+        nafs = [(get_naf_w(k, len(table).bit_length() + 1), table) for k, table in terms if k]
+        if not nafs: return None
+        result = None
+        for i in range(max(len(naf) for naf, _ in nafs) - 1, -1, -1):
+            if result is not None: result = self.add(result, result)
+            for naf, table in nafs:
+                if i < len(naf) and naf[i]:
+                    d = naf[i]
+                    result = self.add(result, table[d >> 1] if d > 0 else self.neg(table[-d >> 1]))
+        return result
+
+    def _terms(self, k: int, pt: Point, width: int) -> List[Tuple[int, List[Point]]]:
+        table = self._g_wnaf_table() if pt == self.G else self.wnaf_table(pt, width)
+        return [(k % self.n, table)]
+
+    def scalar_mult(self, k: int, pt: Point, width: int = 5) -> Union[Point, None]:
+        if pt is None or k % self.n == 0: return None
+        return self._multi_wnaf(self._terms(k, pt, width))
+
+    def multi_scalar_mult(self, pairs: List[Tuple[int, Point]], width: int = 5) -> Union[Point, None]:
+        """Σ k_i·P_i，验签中的 u1·G + u2·Q 只需一条倍点链"""
+        terms = []
+        for k, pt in pairs:
+            if pt is not None and k % self.n: terms.extend(self._terms(k, pt, width))
+        return self._multi_wnaf(terms)
+
+    # -- 编码 --
+    def encode_point(self, pt: Point, compressed: bool = True) -> bytes:
+        x, y = pt
+        if compressed: return bytes([2 | (y & 1)]) + x.to_bytes(self.byte_len, 'big')
+        return b'\x04' + x.to_bytes(self.byte_len, 'big') + y.to_bytes(self.byte_len, 'big')
+
+    def decode_point(self, data: bytes) -> Point:
+        """SEC1 编码 (02/03 压缩或 04 非压缩)，要求 p ≡ 3 (mod 4)"""
+        if len(data) == 1 + self.byte_len and data[0] in (2, 3):
+            x = int.from_bytes(data[1:], 'big')
+            rhs = (x * x * x + self.a * x + self.b) % self.p
+            y = powmod(rhs, (self.p + 1) // 4, self.p)
+            if y * y % self.p != rhs: raise ValueError("Point is not on the curve.")
+            if y & 1 != data[0] & 1: y = self.p - y
+            pt = (x, y)
+        elif len(data) == 1 + 2 * self.byte_len and data[0] == 4:
+            pt = (int.from_bytes(data[1:1 + self.byte_len], 'big'), int.from_bytes(data[1 + self.byte_len:], 'big'))
+        else:
+            raise ValueError("Invalid point encoding.")
+        if not self.is_on_curve(pt): raise ValueError("Point is not on the curve.")
+        return pt
+
+class GLVCurve(Curve):
+    """带 GLV 自同态的曲线：φ(x, y) = (βx, y) = λ·(x, y)，格基 (a1, b1), (a2, b2) 满足 a + bλ ≡ 0 (mod n)"""
+    def __init__(self, name: str, p: int, a: int, b: int, n: int, gx: int, gy: int,
+                 beta: int, lam: int, basis: Tuple[int, int, int, int]):
+        super().__init__(name, p, a, b, n, gx, gy)
+        self.beta, self.lam = beta, lam
+        self.a1, self.b1, self.a2, self.b2 = basis
+        self._g_phi_table = None
+
+    def endomorphism(self, pt: Point) -> Point:
+        return (self.beta * pt[0] % self.p, pt[1])
+
+    def split_scalar(self, k: int) -> Tuple[int, int]:
+        """k ≡ k1 + k2·λ (mod n)，|k1|、|k2| ≈ √n"""
+        n = self.n
+        c1 = (2 * self.b2 * k + n) // (2 * n)
+        c2 = (-2 * self.b1 * k + n) // (2 * n)
+        k1 = k - c1 * self.a1 - c2 * self.a2
+        k2 = -c1 * self.b1 - c2 * self.b2
+        return k1, k2
+
+    def _terms(self, k: int, pt: Point, width: int) -> List[Tuple[int, List[Point]]]:
+        k1, k2 = self.split_scalar(k % self.n)
+        if pt == self.G:
+            table = self._g_wnaf_table()
+            if self._g_phi_table is None: self._g_phi_table = [self.endomorphism(q) for q in table]
+            phi_table = self._g_phi_table
+        else:
+            table = self.wnaf_table(pt, width)
+            phi_table = [self.endomorphism(q) for q in table]  # φ 是群同态，表可直接映射
+        terms = []
+        for ki, t in ((k1, table), (k2, phi_table)):
+            terms.append((ki, t) if ki >= 0 else (-ki, [self.neg(q) for q in t]))
+        return terms
+
+SM2_CURVE = Curve(
+    "SM2",
+    p=0xFFFFFFFE_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_00000000_FFFFFFFF_FFFFFFFF,
+    a=0xFFFFFFFE_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_00000000_FFFFFFFF_FFFFFFFC,
+    b=0x28E9FA9E_9D9F5E34_4D5A9E4B_CF6509A7_F39789F5_15AB8F92_DDBCBD41_4D940E93,
+    n=0xFFFFFFFE_FFFFFFFF_FFFFFFFF_FFFFFFFF_7203DF6B_21C6052B_53BBF409_39D54123,
+    gx=0x32C4AE2C_1F198119_5F990446_6A39C994_8FE30BBF_F2660BE1_715A4589_334C74C7,
+    gy=0xBC3736A2_F4F6779C_59BDCEE3_6B692153_D0A9877C_C62A4740_02DF32E5_2139F0A0)
+
+SECP256K1 = GLVCurve(
+    "secp256k1",
+    p=0xFFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFE_FFFFFC2F,
+    a=0, b=7,
+    n=0xFFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFE_BAAEDCE6_AF48A03B_BFD25E8C_D0364141,
+    gx=0x79BE667E_F9DCBBAC_55A06295_CE870B07_029BFCDB_2DCE28D9_59F2815B_16F81798,
+    gy=0x483ADA77_26A3C465_5DA4FBFC_0E1108A8_FD17B448_A6855419_9C47D08F_FB10D4B8,
+    beta=0x7AE96A2B_657C0710_6E64479E_AC3434E9_9CF04975_12F58995_C1396C28_719501EE,
+    lam=0x5363AD4C_C05C30E0_A5261C02_8812645A_122E22EA_20816678_DF02967C_1B23BD72,
+    basis=(0x3086D221_A7D46BCD_E86C90E4_9284EB15, -0xE4437ED6_010E8828_6F547FA9_0ABFE4C3,
+           0x1_14CA50F7_A8E2F3F6_57C1108D_9D44CFD8, 0x3086D221_A7D46BCD_E86C90E4_9284EB15))
+
+# -- ECDSA --
+def _digest_to_int(curve: Curve, digest: bytes) -> int:
+    e = int.from_bytes(digest, 'big')
+    excess = len(digest) * 8 - curve.n.bit_length()
+    return e >> excess if excess > 0 else e
+
+def ecdsa_sign(curve: Curve, private_key: int, digest: bytes, k: int = None) -> Tuple[int, int]:
+    """对预先哈希的 digest 签名 (对应 cryptography 的 ECDSA(Prehashed(...)))"""
+    e = _digest_to_int(curve, digest)
+    while True:
+        nonce = k if k is not None else secrets.randbelow(curve.n - 1) + 1
+        r = curve.scalar_mult(nonce, curve.G)[0] % curve.n
+        s = invert(nonce, curve.n) * (e + r * private_key) % curve.n
+        if r and s: return r, s
+        if k is not None: raise ValueError("k produces an invalid signature")
+
+def ecdsa_verify(curve: Curve, public_key: Point, digest: bytes, signature: Tuple[int, int]) -> bool:
+    r, s = signature
+    if not (1 <= r < curve.n and 1 <= s < curve.n): return False
+    w = invert(s, curve.n)
+    e = _digest_to_int(curve, digest)
+    pt = curve.multi_scalar_mult([(e * w % curve.n, curve.G), (r * w % curve.n, public_key)])
+    return pt is not None and pt[0] % curve.n == r
+
+def encode_der_signature(r: int, s: int) -> bytes:
+    def der_int(v: int) -> bytes:
+        body = v.to_bytes((v.bit_length() + 8) // 8, 'big')  # 多留一位，保证最高位为 0
+        return b'\x02' + bytes([len(body)]) + body
+    body = der_int(r) + der_int(s)
+    return b'\x30' + bytes([len(body)]) + body
+
+def decode_der_signature(der: bytes) -> Tuple[int, int]:
+    if len(der) < 8 or der[0] != 0x30 or der[1] != len(der) - 2: raise ValueError("Invalid DER signature.")
+    values, pos = [], 2
+    for _ in range(2):
+        if pos + 2 > len(der) or der[pos] != 0x02: raise ValueError("Invalid DER signature.")
+        length = der[pos + 1]
+        if length == 0 or length & 0x80 or pos + 2 + length > len(der): raise ValueError("Invalid DER signature.")
+        body = der[pos + 2:pos + 2 + length]
+        # 拒绝负数和非最简编码 (多余的前导 0x00)
+        if body[0] & 0x80 or (length > 1 and body[0] == 0 and not body[1] & 0x80): raise ValueError("Invalid DER signature.")
+        values.append(int.from_bytes(body, 'big'))
+        pos += 2 + length
+    if pos != len(der): raise ValueError("Invalid DER signature.")
+    return values[0], values[1]
+
+
+if __name__ == '__main__':
+    curve = SECP256K1
+    k = secrets.randbelow(curve.n - 1) + 1
+    plain = Curve("secp256k1-plain", curve.p, curve.a, curve.b, curve.n, *curve.G)
+
+    start = time.time()
+    for _ in range(20): expected = plain.scalar_mult(k, plain.G)
+    end = time.time()
+    print(f"w-NAF 标量乘平均耗时: {(end - start) / 20 * 1000:.3f} 毫秒")
+    start = time.time()
+    for _ in range(20): result = curve.scalar_mult(k, curve.G)
+    end = time.time()
+    print(f"GLV 标量乘平均耗时: {(end - start) / 20 * 1000:.3f} 毫秒")
+    print(f"结果一致: {result == expected}")
+
+    d = secrets.randbelow(curve.n - 1) + 1
+    Q = curve.scalar_mult(d, curve.G)
+    digest = hashlib.sha256(hashlib.sha256(b"The Times 03/Jan/2009").digest()).digest()
+    signature = ecdsa_sign(curve, d, digest)
+    der = encode_der_signature(*signature)
+    print(f"公钥: {curve.encode_point(Q).hex()}")
+    print(f"签名: {der.hex()}")
+    print(f"验签结果: {'成功' if ecdsa_verify(curve, curve.decode_point(curve.encode_point(Q)), digest, decode_der_signature(der)) else '失败'}")
@@ -0,0 +1,116 @@
+import itertools
+import os
+import atexit
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Tuple
+
+from SM2_new import SM2Key, PEER_TABLE_CACHE, compute_z
+
+# ==================== [ 多进程批量签名/验签 ] ====================
+# GIL 使单进程只能用满一个核；这里把消息按 chunk_size 分块发给常驻进程池，
+# 每个工作进程只在启动时加载一次密钥和预计算表，结果按输入顺序返回。
+
+DEFAULT_USER_ID = "1234567812345678"
+
+_worker_key = None  # 工作进程内的 SM2Key
+
+def _init_worker(private_key: int, public_key: Tuple[int, int], user_id: str) -> None:
+    global _worker_key
+    _worker_key = SM2Key(private_key=private_key) if private_key else SM2Key(public_key=public_key)
+    PEER_TABLE_CACHE.preload(_worker_key.public_key)  # 验签用到的公钥表
+    compute_z(user_id, *_worker_key.public_key)       # 预热默认 ID 的 Z 值
+
+def _sign_chunk(messages: List[bytes], user_id: str) -> List[Tuple[int, int]]:
+    return [_worker_key.sign(m, user_id) for m in messages]
+
+def _verify_chunk(items: List[Tuple[bytes, Tuple[int, int]]], user_id: str) -> List[bool]:
+    return [_worker_key.verify(m, sig, user_id) for m, sig in items]
+
+class SM2Pool:
+    """绑定一个 SM2Key 的常驻进程池"""
+    def __init__(self, key: SM2Key, workers: int = None, user_id: str = DEFAULT_USER_ID):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(key.private_key, key.public_key, user_id))
+
+    def submit_sign(self, messages: List[bytes], user_id: str = DEFAULT_USER_ID) -> Future:
+        """提交一个签名块，返回 concurrent.futures.Future"""
+        return self._executor.submit(_sign_chunk, messages, user_id)
+
+    def submit_verify(self, items: List[Tuple[bytes, Tuple[int, int]]], user_id: str = DEFAULT_USER_ID) -> Future:
+        """提交一个验签块，返回 concurrent.futures.Future"""
+        return self._executor.submit(_verify_chunk, items, user_id)
+
+    def _map_chunks(self, submit, items: Iterable, user_id: str, chunk_size: int, max_in_flight: int) -> Iterator:
+        """按块提交，最多 max_in_flight 个块在途，按提交顺序产出结果"""
+        if chunk_size < 1: raise ValueError("chunk_size must be positive")
+        max_in_flight = max_in_flight or 2 * self.workers
+        items = iter(items)
+        pending = deque()
+        while True:
+            while len(pending) < max_in_flight:
+                chunk = list(itertools.islice(items, chunk_size))
+                if not chunk: break
+                pending.append(submit(chunk, user_id))
+            if not pending: return
+            yield from pending.popleft().result()
+
+    def sign_many(self, messages: Iterable[bytes], user_id: str = DEFAULT_USER_ID,
+                  chunk_size: int = 64, max_in_flight: int = None) -> Iterator[Tuple[int, int]]:
+        return self._map_chunks(self.submit_sign, messages, user_id, chunk_size, max_in_flight)
+
+    def verify_many(self, items: Iterable[Tuple[bytes, Tuple[int, int]]], user_id: str = DEFAULT_USER_ID,
+                    chunk_size: int = 64, max_in_flight: int = None) -> Iterator[bool]:
+        return self._map_chunks(self.submit_verify, items, user_id, chunk_size, max_in_flight)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown()
+
+_pools = {}  # (private_key, public_key, workers) -> SM2Pool
+
+def get_pool(key: SM2Key, workers: int = None) -> SM2Pool:
+    """同一密钥复用同一个进程池，进程退出时统一关闭"""
+    pool_id = (key.private_key, key.public_key, workers)
+    if pool_id not in _pools:
+        _pools[pool_id] = SM2Pool(key, workers)
+    return _pools[pool_id]
+
+@atexit.register
+def shutdown_pools() -> None:
+    while _pools:
+        _pools.popitem()[1].shutdown()
+
+def sign_many(key: SM2Key, messages: Iterable[bytes], user_id: str = DEFAULT_USER_ID,
+              chunk_size: int = 64, max_in_flight: int = None, workers: int = None) -> Iterator[Tuple[int, int]]:
+    """批量签名，返回与 messages 顺序一致的签名迭代器"""
+    if not key.private_key: raise ValueError("Private key is not available for signing.")
+    return get_pool(key, workers).sign_many(messages, user_id, chunk_size, max_in_flight)
+
+def verify_many(key: SM2Key, items: Iterable[Tuple[bytes, Tuple[int, int]]], user_id: str = DEFAULT_USER_ID,
+                chunk_size: int = 64, max_in_flight: int = None, workers: int = None) -> Iterator[bool]:
+    """批量验签，items 为 (message, signature)，返回与输入顺序一致的布尔值迭代器"""
+    return get_pool(SM2Key(public_key=key.public_key), workers).verify_many(items, user_id, chunk_size, max_in_flight)
+
+
+if __name__ == '__main__':
+    sm2_key = SM2Key()
+    messages = [f"record-{i}".encode() for i in range(2000)]
+
+    start = time.time()
+    serial = [sm2_key.sign(m) for m in messages[:200]]
+    end = time.time()
+    print(f"单进程签名 200 条: {end - start:.3f} 秒")
+
+    get_pool(sm2_key)  # 进程池启动与建表不计入耗时
+    start = time.time()
+    signatures = list(sign_many(sm2_key, messages))
+    end = time.time()
+    print(f"进程池签名 {len(messages)} 条 ({os.cpu_count()} 核): {end - start:.3f} 秒")
+
+    start = time.time()
+    results = list(verify_many(sm2_key, zip(messages, signatures)))
+    end = time.time()
+    print(f"进程池验签 {len(messages)} 条: {end - start:.3f} 秒, 全部通过: {all(results)}")
@@ -0,0 +1,109 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from SM2_new import SM2Key, Gx, Gy, N, scalar_mult, scalar_mult_double_and_add
+from ECC import SM2_CURVE
+
+# ==================== [ SM2 基准测试 ] ====================
+# 每项先预热 warmup 次，再做 repeat 次独立计时，报告最小值、均值与 p50/p90/p99 (毫秒)。
+# --json 输出结果；--baseline 与已有 JSON 比较 p50，超出 --tolerance 时返回非零退出码，供 CI 使用。
+
+# 标量乘法引擎：名称 -> f(k, P)。新的实现注册到这里即可出现在报告中
+ENGINES: Dict[str, Callable] = {"double_and_add": scalar_mult_double_and_add}
+for _width in (3, 4, 5, 6, 7):
+    ENGINES[f"wnaf_w{_width}"] = lambda k, p, w=_width: scalar_mult(k, p, w)
+ENGINES["ecc_generic_w5"] = SM2_CURVE.scalar_mult  # ECC.py 通用曲线引擎 (G 使用缓存的 w=7 表)
+
+def register_engine(name: str, func: Callable) -> None:
+    ENGINES[name] = func
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """线性插值分位数"""
+    if len(sorted_samples) == 1: return sorted_samples[0]
+    pos = q * (len(sorted_samples) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (pos - lo)
+
+def measure(func: Callable[[], object], warmup: int, repeat: int) -> dict:
+    for _ in range(warmup): func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {"n": repeat, "min_ms": samples[0], "mean_ms": sum(samples) / repeat,
+            "p50_ms": percentile(samples, 0.50), "p90_ms": percentile(samples, 0.90),
+            "p99_ms": percentile(samples, 0.99)}
+
+def run_benchmarks(warmup: int = 3, repeat: int = 20, only: List[str] = None, seed: int = 0) -> Dict[str, dict]:
+    rng = random.Random(seed)
+    scalars = [rng.randrange(1, N) for _ in range(64)]
+    G = (Gx, Gy)
+    sm2_key = SM2Key(private_key=scalars[0])
+    verifier = SM2Key(public_key=sm2_key.public_key)
+    message = b"benchmark message"
+    signature = sm2_key.sign(message)
+    ciphertext = verifier.encrypt(message)
+    it = iter(range(1 << 62))
+    next_scalar = lambda: scalars[next(it) % len(scalars)]
+
+    cases = {
+        "keygen": lambda: SM2Key(private_key=next_scalar()),
+        "sign": lambda: sm2_key.sign(message),
+        "verify": lambda: verifier.verify(message, signature),
+        "encrypt": lambda: verifier.encrypt(message),
+        "decrypt": lambda: sm2_key.decrypt(ciphertext),
+    }
+    for name, engine in ENGINES.items():
+        cases[f"scalar_mult/{name}"] = lambda engine=engine: engine(next_scalar(), G)
+
+    results = {}
+    for name, case in cases.items():
+        if only and not any(name.startswith(prefix) for prefix in only): continue
+        results[name] = measure(case, warmup, repeat)
+    return results
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """返回 p50 比基线慢超过 tolerance 的项目"""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base and stats["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: {base['p50_ms']:.3f} -> {stats['p50_ms']:.3f} ms")
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="SM2 基准测试")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="只运行以这些前缀开头的项目，如 sign scalar_mult/")
+    parser.add_argument("--json", help="结果写入该 JSON 文件")
+    parser.add_argument("--baseline", help="与之比较的基线 JSON 文件")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的 p50 变慢比例")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.warmup, args.repeat, args.only)
+    print(f"{'项目':<28}{'min':>10}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}  (毫秒)")
+    for name, stats in results.items():
+        print(f"{name:<28}{stats['min_ms']:>10.3f}{stats['mean_ms']:>10.3f}{stats['p50_ms']:>10.3f}"
+              f"{stats['p90_ms']:>10.3f}{stats['p99_ms']:>10.3f}")
+
+    if args.json:
+        report = {"meta": {"python": sys.version.split()[0], "platform": platform.platform(),
+                           "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                           "warmup": args.warmup, "repeat": args.repeat},
+                  "results": results}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for line in regressions: print("性能回退:", line)
+        sys.exit(1 if regressions else 0)
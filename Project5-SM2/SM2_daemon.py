@@ -0,0 +1,257 @@
+import argparse
+import asyncio
+import json
+import os
+import struct
+import tempfile
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+from SM2_new import SM2Key
+from SM2_batch import SM2Pool, DEFAULT_USER_ID
+
+# ==================== [ 本地签名守护进程 ] ====================
+# 帧格式: 4 字节大端长度 + 负载
+#   请求: op(1) ‖ req_id(4) ‖ body
+#     OP_SIGN   body = message
+#     OP_VERIFY body = r(32) ‖ s(32) ‖ message
+#     OP_STATS  body = 空
+#   响应: status(1) ‖ req_id(4) ‖ body
+#     签名返回 r(32) ‖ s(32)，验签返回 1 字节 0/1，统计返回 JSON，出错时 body 为错误信息
+# 并发到达的请求先进入批处理队列，凑满 max_batch 或等待 max_delay 后整批交给进程池。
+
+OP_SIGN, OP_VERIFY, OP_STATS = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 0, 1
+_HEADER = struct.Struct(">BI")
+_LENGTH = struct.Struct(">I")
+MAX_FRAME = 1 << 20
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    length, = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    if length > MAX_FRAME: raise ValueError("frame too large")
+    return await reader.readexactly(length)
+
+def encode_frame(payload: bytes) -> bytes:
+    return _LENGTH.pack(len(payload)) + payload
+
+class DaemonStats:
+    """吞吐与延迟计数器 (延迟保留最近 window 个样本)"""
+    def __init__(self, window: int = 10000):
+        self.started = time.perf_counter()
+        self.requests = {OP_SIGN: 0, OP_VERIFY: 0}
+        self.errors = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, op: int, latency: float) -> None:
+        self.requests[op] += 1
+        self.latencies.append(latency)
+
+    def snapshot(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        total = sum(self.requests.values())
+        lat = sorted(self.latencies)
+        pick = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] * 1000 if lat else 0.0
+        return {"sign": self.requests[OP_SIGN], "verify": self.requests[OP_VERIFY], "errors": self.errors,
+                "batches": self.batches, "avg_batch": self.batched_items / self.batches if self.batches else 0.0,
+                "throughput_per_s": total / elapsed if elapsed else 0.0,
+                "latency_ms_p50": pick(0.50), "latency_ms_p99": pick(0.99)}
+
+class MicroBatcher:
+    """把跨连接的并发请求聚合成批，交给进程池执行"""
+    def __init__(self, pool: SM2Pool, stats: DaemonStats, user_id: str = DEFAULT_USER_ID,
+                 max_batch: int = 64, max_delay: float = 0.002):
+        self.pool = pool
+        self.stats = stats
+        self.user_id = user_id
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[int, object, asyncio.Future]] = []
+        self._timer = None
+
+    def submit(self, op: int, item) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((op, item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch: return
+        self.stats.batches += 1
+        self.stats.batched_items += len(batch)
+        for op, submit in ((OP_SIGN, self.pool.submit_sign), (OP_VERIFY, self.pool.submit_verify)):
+            group = [(item, fut) for o, item, fut in batch if o == op]
+            if group:
+                done = asyncio.wrap_future(submit([item for item, _ in group], self.user_id))
+                done.add_done_callback(lambda f, g=group: self._resolve(f, g))
+
+    @staticmethod
+    def _resolve(done: asyncio.Future, group: list) -> None:
+        if done.exception() is not None:
+            for _, fut in group:
+                if not fut.done(): fut.set_exception(done.exception())
+            return
+        for (_, fut), result in zip(group, done.result()):
+            if not fut.done(): fut.set_result(result)
+
+class SM2Daemon:
+    def __init__(self, key: SM2Key, socket_path: str, workers: int = None, **batch_options):
+        self.key = key
+        self.socket_path = socket_path
+        self.stats = DaemonStats()
+        self.pool = SM2Pool(key, workers)
+        self.batcher = MicroBatcher(self.pool, self.stats, **batch_options)
+        self._server = None
+        self._connections = set()
+
+    async def start(self) -> None:
+        if os.path.exists(self.socket_path): os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        self._server.close()
+        for task in list(self._connections): task.cancel()
+        await self._server.wait_closed()
+        self.pool.shutdown()
+        if os.path.exists(self.socket_path): os.unlink(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks = set()
+        self._connections.add(asyncio.current_task())
+        try:
+            while True:
+                frame = await read_frame(reader)
+                task = asyncio.create_task(self._process(frame, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, asyncio.CancelledError):
+            pass  # 对端断开或守护进程关闭
+        finally:
+            self._connections.discard(asyncio.current_task())
+            if tasks: await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _process(self, frame: bytes, writer: asyncio.StreamWriter) -> None:
+        start = time.perf_counter()
+        req_id = 0
+        try:
+            op, req_id = _HEADER.unpack_from(frame)
+            body = frame[_HEADER.size:]
+            if op == OP_SIGN:
+                r, s = await self.batcher.submit(OP_SIGN, body)
+                result = r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
+            elif op == OP_VERIFY:
+                if len(body) < 64: raise ValueError("verify request too short")
+                sig = (int.from_bytes(body[:32], 'big'), int.from_bytes(body[32:64], 'big'))
+                result = bytes([await self.batcher.submit(OP_VERIFY, (body[64:], sig))])
+            elif op == OP_STATS:
+                result = json.dumps(self.stats.snapshot()).encode()
+            else:
+                raise ValueError(f"unknown op {op}")
+            if op != OP_STATS: self.stats.record(op, time.perf_counter() - start)
+            writer.write(encode_frame(_HEADER.pack(STATUS_OK, req_id) + result))
+        except Exception as exc:
+            self.stats.errors += 1
+            writer.write(encode_frame(_HEADER.pack(STATUS_ERROR, req_id) + str(exc).encode()))
+
+class SM2Client:
+    """守护进程客户端：一条连接上可并发发出多个请求，按 req_id 匹配响应"""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader, self._writer = reader, writer
+        self._next_id = 0
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._reader_task = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def connect(cls, socket_path: str) -> 'SM2Client':
+        return cls(*await asyncio.open_unix_connection(socket_path))
+
+    async def _read_responses(self) -> None:
+        try:
+            while True:
+                frame = await read_frame(self._reader)
+                status, req_id = _HEADER.unpack_from(frame)
+                fut = self._waiting.pop(req_id, None)
+                if fut is None or fut.done(): continue
+                if status == STATUS_OK: fut.set_result(frame[_HEADER.size:])
+                else: fut.set_exception(RuntimeError(frame[_HEADER.size:].decode()))
+        except (asyncio.IncompleteReadError, ConnectionError) as exc:
+            for fut in self._waiting.values():
+                if not fut.done(): fut.set_exception(ConnectionError(str(exc)))
+            self._waiting.clear()
+
+    async def _request(self, op: int, body: bytes = b'') -> bytes:
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = fut
+        self._writer.write(encode_frame(_HEADER.pack(op, self._next_id) + body))
+        await self._writer.drain()
+        return await fut
+
+    async def sign(self, message: bytes) -> Tuple[int, int]:
+        result = await self._request(OP_SIGN, message)
+        return int.from_bytes(result[:32], 'big'), int.from_bytes(result[32:], 'big')
+
+    async def verify(self, message: bytes, signature: Tuple[int, int]) -> bool:
+        r, s = signature
+        result = await self._request(OP_VERIFY, r.to_bytes(32, 'big') + s.to_bytes(32, 'big') + message)
+        return result == b'\x01'
+
+    async def stats(self) -> dict:
+        return json.loads(await self._request(OP_STATS))
+
+    async def close(self) -> None:
+        self._reader_task.cancel()
+        self._writer.close()
+        await self._writer.wait_closed()
+
+async def _demo(requests: int) -> None:
+    socket_path = os.path.join(tempfile.mkdtemp(), "sm2d.sock")
+    daemon = SM2Daemon(SM2Key(), socket_path)
+    await daemon.start()
+    clients = [await SM2Client.connect(socket_path) for _ in range(4)]
+    messages = [f"request-{i}".encode() for i in range(requests)]
+
+    start = time.time()
+    signatures = await asyncio.gather(*(clients[i % 4].sign(m) for i, m in enumerate(messages)))
+    results = await asyncio.gather(*(clients[i % 4].verify(m, sig) for i, (m, sig) in enumerate(zip(messages, signatures))))
+    end = time.time()
+    print(f"{requests} 次签名 + {requests} 次验签: {end - start:.3f} 秒, 全部通过: {all(results)}")
+    print(f"篡改消息验签: {'成功' if await clients[0].verify(b'tampered', signatures[0]) else '失败'}")
+    print("守护进程统计:", json.dumps(await clients[0].stats(), ensure_ascii=False))
+
+    for client in clients: await client.close()
+    await daemon.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="SM2 本地签名/验签守护进程 (Unix socket)")
+    parser.add_argument("--socket", help="监听的 Unix socket 路径；不指定时运行本机演示")
+    parser.add_argument("--private-key", help="十六进制私钥，不指定则随机生成")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-delay-ms", type=float, default=2.0)
+    parser.add_argument("--demo-requests", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.socket is None:
+        asyncio.run(_demo(args.demo_requests))
+    else:
+        key = SM2Key(private_key=int(args.private_key, 16)) if args.private_key else SM2Key()
+        print(f"公钥: {key.public_key[0]:064x}{key.public_key[1]:064x}")
+        daemon = SM2Daemon(key, args.socket, args.workers, max_batch=args.max_batch,
+                           max_delay=args.max_delay_ms / 1000)
+        asyncio.run(daemon.serve_forever())
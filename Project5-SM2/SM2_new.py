@@ -1,8 +1,15 @@
 import hashlib
 import random
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache, wraps
 from typing import Tuple, Union, List
 import time
 
+from arith import powmod, invert
+
 # -- SM2 推荐曲线参数 (来自 GB/T 32918.2-2016) --
 P = 0xFFFFFFFE_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_00000000_FFFFFFFF_FFFFFFFF
 A = 0xFFFFFFFE_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_00000000_FFFFFFFF_FFFFFFFC
@@ -13,7 +20,7 @@ Gy = 0xBC3736A2_F4F6779C_59BDCEE3_6B692153_D0A9877C_C62A4740_02DF32E5_2139F0A0
 
 Point = Tuple[int, int]  # 点定义为 (x, y)
 
-# -- SM3实现 (保持不变) --
+# -- SM3实现 (拆出压缩函数，支持增量计算) --
 def _rotate_left(x: int, n: int) -> int:
     return ((x << n) | (x >> (32 - n))) & 0xFFFFFFFF
 def _ff(x: int, y: int, z: int, j: int) -> int:
@@ -24,41 +31,64 @@ def _p0(x: int) -> int:
     return x ^ _rotate_left(x, 9) ^ _rotate_left(x, 17)
 def _p1(x: int) -> int:
     return x ^ _rotate_left(x, 15) ^ _rotate_left(x, 23)
+SM3_IV = (0x7380166F, 0x4914B2B9, 0x172442D7, 0xDA8A0600,
+          0xA96F30BC, 0x163138AA, 0xE38DEE4D, 0xB0FB0E4E)
+
+def _sm3_compress(iv: List[int], block: bytes) -> List[int]:
+    """SM3 压缩函数：对一个 64 字节分组更新链接变量"""
+    w = [int.from_bytes(block[j:j+4], 'big') for j in range(0, 64, 4)]
+    for j in range(16, 68):
+        term = w[j-16] ^ w[j-9] ^ _rotate_left(w[j-3], 15)
+        w.append(_p1(term) ^ _rotate_left(w[j-13], 7) ^ w[j-6])
+    w_prime = [(w[j] ^ w[j+4]) for j in range(64)]
+    a, b, c, d, e, f, g, h = iv
+    for j in range(64):
+        t_j = 0x79CC4519 if 0 <= j <= 15 else 0x7A879D8A
+        ss1 = _rotate_left((_rotate_left(a, 12) + e + _rotate_left(t_j, j % 32)) & 0xFFFFFFFF, 7)
+        ss2 = ss1 ^ _rotate_left(a, 12)
+        tt1 = (_ff(a, b, c, j) + d + ss2 + w_prime[j]) & 0xFFFFFFFF
+        tt2 = (_gg(e, f, g, j) + h + ss1 + w[j]) & 0xFFFFFFFF
+        d = c; c = _rotate_left(b, 9); b = a; a = tt1
+        h = g; g = _rotate_left(f, 19); f = e; e = _p0(tt2)
+    return [(iv[k] ^ [a,b,c,d,e,f,g,h][k]) & 0xFFFFFFFF for k in range(8)]
+
+class SM3Hash:
+    """增量 SM3：update() 只压缩完整分组，copy() 可保存公共前缀的中间状态 (midstate)"""
+    def __init__(self, data: bytes = b''):
+        self._iv = list(SM3_IV)
+        self._buffer = b''
+        self._length = 0
+        if data: self.update(data)
+
+    def update(self, data: bytes) -> None:
+        self._length += len(data)
+        data = self._buffer + bytes(data)
+        full = len(data) - len(data) % 64
+        for i in range(0, full, 64):
+            self._iv = _sm3_compress(self._iv, data[i:i+64])
+        self._buffer = data[full:]
+
+    def copy(self) -> 'SM3Hash':
+        other = SM3Hash.__new__(SM3Hash)
+        other._iv, other._buffer, other._length = list(self._iv), self._buffer, self._length
+        return other
+
+    def digest(self) -> bytes:
+        tail = self._buffer + b'\x80'
+        tail += b'\x00' * ((56 - len(tail)) % 64)
+        tail += (self._length * 8).to_bytes(8, 'big')
+        iv = self._iv
+        for i in range(0, len(tail), 64):
+            iv = _sm3_compress(iv, tail[i:i+64])
+        return b''.join(x.to_bytes(4, 'big') for x in iv)
+
 def get_hash(data: bytes) -> bytes:
-    iv = [0x7380166F, 0x4914B2B9, 0x172442D7, 0xDA8A0600,
-          0xA96F30BC, 0x163138AA, 0xE38DEE4D, 0xB0FB0E4E]
-    length = len(data)
-    padded_data = data + b'\x80'
-    padded_data += b'\x00' * ((56 - (length + 1) % 64) % 64)
-    padded_data += (length * 8).to_bytes(8, 'big')
-    for i in range(0, len(padded_data), 64):
-        block = padded_data[i:i+64]
-        w = [int.from_bytes(block[j:j+4], 'big') for j in range(0, 64, 4)]
-        for j in range(16, 68):
-            term = w[j-16] ^ w[j-9] ^ _rotate_left(w[j-3], 15)
-            w.append(_p1(term) ^ _rotate_left(w[j-13], 7) ^ w[j-6])
-        w_prime = [(w[j] ^ w[j+4]) for j in range(64)]
-        a, b, c, d, e, f, g, h = iv
-        for j in range(64):
-            t_j = 0x79CC4519 if 0 <= j <= 15 else 0x7A879D8A
-            ss1 = _rotate_left((_rotate_left(a, 12) + e + _rotate_left(t_j, j % 32)) & 0xFFFFFFFF, 7)
-            ss2 = ss1 ^ _rotate_left(a, 12)
-            tt1 = (_ff(a, b, c, j) + d + ss2 + w_prime[j]) & 0xFFFFFFFF
-            tt2 = (_gg(e, f, g, j) + h + ss1 + w[j]) & 0xFFFFFFFF
-            d = c; c = _rotate_left(b, 9); b = a; a = tt1
-            h = g; g = _rotate_left(f, 19); f = e; e = _p0(tt2)
-        iv = [(iv[k] ^ [a,b,c,d,e,f,g,h][k]) & 0xFFFFFFFF for k in range(8)]
-    return b''.join(x.to_bytes(4, 'big') for x in iv)
-
-# -- 基础数学运算 (保持不变) --
+    return SM3Hash(data).digest()
+
+# -- 基础数学运算：模逆与模幂走 arith 后端 (有 gmpy2 时用 GMP)；256 位模乘内联 % P 更快 --
 def inv(a: int, n: int) -> int:
-    if a == 0: raise ZeroDivisionError("inverse of 0 does not exist")
-    lm, hm, low, high = 1, 0, a % n, n
-    while low > 1:
-        r = high // low
-        nm, new = hm - lm * r, high - low * r
-        lm, low, hm, high = nm, new, lm, low
-    return lm % n
+    if a % n == 0: raise ZeroDivisionError("inverse of 0 does not exist")
+    return invert(a, n)
 
 # -- 椭圆曲线运算 (保持不变) --
 def is_on_curve(p: Point) -> bool:
@@ -79,6 +109,45 @@ def point_add(p1: Point, p2: Point) -> Union[Point, None]:
     y3 = (m * (x1 - x3) - y1) % P
     return (x3, y3)
 
+# -- 点编码：非压缩 x‖y (64 字节) / 压缩 02|03‖x (33 字节) --
+_SQRT_EXP = (P + 1) // 4  # P ≡ 3 (mod 4)，平方根只需一次模幂
+
+def sqrt_mod_p(a: int) -> Union[int, None]:
+    """模 P 平方根，a 不是二次剩余时返回 None"""
+    y = powmod(a, _SQRT_EXP, P)
+    return y if y * y % P == a % P else None
+
+def point_to_bytes(p: Point, compressed: bool = False) -> bytes:
+    x, y = p
+    if compressed: return bytes([2 | (y & 1)]) + x.to_bytes(32, 'big')
+    return x.to_bytes(32, 'big') + y.to_bytes(32, 'big')
+
+@lru_cache(maxsize=1024)
+def validate_point(p: Point) -> Point:
+    """检查坐标范围与曲线方程；同一个点只检查一次"""
+    x, y = p
+    if not (0 <= x < P and 0 <= y < P and is_on_curve(p)): raise ValueError("Point is not on the curve.")
+    return p
+
+@lru_cache(maxsize=1024)
+def point_from_bytes(data: bytes) -> Point:
+    """解析 33 字节压缩点或 64 字节 x‖y (也接受带 04 前缀的 65 字节)，结果已校验并缓存"""
+    if len(data) == 33 and data[0] in (2, 3):
+        x = int.from_bytes(data[1:], 'big')
+        if x >= P: raise ValueError("Point is not on the curve.")
+        y = sqrt_mod_p((x * x * x + A * x + B) % P)
+        if y is None: raise ValueError("Point is not on the curve.")
+        if y & 1 != data[0] & 1: y = P - y
+        return validate_point((x, y))
+    if len(data) == 65 and data[0] == 4: data = data[1:]
+    if len(data) != 64: raise ValueError("Invalid point encoding length.")
+    return validate_point((int.from_bytes(data[:32], 'big'), int.from_bytes(data[32:], 'big')))
+
+def point_from_bytes_many(encoded: List[bytes]) -> List[Point]:
+    """批量解码：重复的编码只解一次，其余走同一条缓存 + sqrt_mod_p 路径"""
+    decoded = {data: point_from_bytes(data) for data in set(encoded)}
+    return [decoded[data] for data in encoded]
+
 # ==================== [ 性能优化改动区域 ] ====================
 
 def scalar_mult_double_and_add(k: int, p: Point) -> Union[Point, None]:
@@ -105,50 +174,135 @@ def get_naf_w(k: int, width: int) -> List[int]:
         k >>= 1
     return naf
 
-def scalar_mult(k: int, p: Point, width: int = 5) -> Union[Point, None]:
-    """标量乘法 - 优化后的 w-NAF 算法"""
-    if p is None or k % N == 0: return None
-    precomputed_points = {}
+def build_wnaf_table(p: Point, width: int = 5) -> List[Point]:
+    """w-NAF 预计算表：table[i] = (2i+1)·p，只保存 |d| < 2^(w-1) 需要的奇数倍点"""
+    table = [p]
     p2 = point_add(p, p)
-    current_p = p
-    for i in range(1, 1 << (width - 1)):
-        precomputed_points[2 * i - 1] = current_p
-        current_p = point_add(current_p, p2)
+    for _ in range(1, 1 << (width - 2)):
+        table.append(point_add(table[-1], p2))
+    return table
+
+def scalar_mult(k: int, p: Point, width: int = 5, table: List[Point] = None) -> Union[Point, None]:
+    """标量乘法 - 优化后的 w-NAF 算法 (传入 table 时复用预计算表，窗口宽度由表长决定)"""
+    if p is None or k % N == 0: return None
+    if table is None: table = build_wnaf_table(p, width)
+    else: width = len(table).bit_length() + 1
     naf = get_naf_w(k, width)
     result = None
     for i in range(len(naf) - 1, -1, -1):
         if result is not None: result = point_add(result, result)
         d = naf[i]
         if d != 0:
-            point_to_add = precomputed_points[d] if d > 0 else point_neg(precomputed_points[-d])
+            point_to_add = table[d >> 1] if d > 0 else point_neg(table[-d >> 1])
             result = point_add(result, point_to_add) if result is not None else point_to_add
     return result
 
+def _table_nbytes(table: List[Point]) -> int:
+    """估算一张预计算表占用的内存 (列表 + 点元组 + 坐标整数)"""
+    return sys.getsizeof(table) + sum(sys.getsizeof(q) + sys.getsizeof(q[0]) + sys.getsizeof(q[1]) for q in table)
+
+class PointTableCache:
+    """公钥 -> w-NAF 预计算表的 LRU 缓存
+
+    - 一个公钥被使用 hot_threshold 次后才建表 (冷门公钥仍走临时建表，不占缓存)
+    - 按 max_bytes 内存预算淘汰最久未使用的表
+    - stats() 返回命中/未命中/建表/淘汰次数
+    """
+    def __init__(self, max_bytes: int = 1 << 20, width: int = 6, hot_threshold: int = 2, max_tracked: int = 4096):
+        self.max_bytes = max_bytes
+        self.width = width
+        self.hot_threshold = hot_threshold
+        self.max_tracked = max_tracked
+        self._tables = OrderedDict()  # public_key -> (table, nbytes)
+        self._seen = OrderedDict()    # 尚未建表的公钥 -> 使用次数
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = self.misses = self.builds = self.evictions = 0
+
+    def get(self, public_key: Point) -> Union[List[Point], None]:
+        """取出公钥的预计算表；公钥尚未变热时返回 None"""
+        with self._lock:
+            entry = self._tables.get(public_key)
+            if entry is not None:
+                self._tables.move_to_end(public_key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            count = self._seen.pop(public_key, 0) + 1
+            if count < self.hot_threshold:
+                self._seen[public_key] = count
+                if len(self._seen) > self.max_tracked: self._seen.popitem(last=False)
+                return None
+        table = build_wnaf_table(public_key, self.width)  # 建表不持锁
+        nbytes = _table_nbytes(table)
+        with self._lock:
+            self.builds += 1
+            if nbytes <= self.max_bytes and public_key not in self._tables:
+                self._tables[public_key] = (table, nbytes)
+                self.nbytes += nbytes
+                while self.nbytes > self.max_bytes:
+                    _, (_, evicted) = self._tables.popitem(last=False)
+                    self.nbytes -= evicted
+                    self.evictions += 1
+        return table
+
+    def preload(self, public_key: Point) -> List[Point]:
+        """跳过热度判断，立即为公钥建表 (长期使用同一对端公钥的进程在启动时调用)"""
+        with self._lock:
+            self._seen[public_key] = max(self._seen.get(public_key, 0), self.hot_threshold - 1)
+        return self.get(public_key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "builds": self.builds,
+                    "evictions": self.evictions, "entries": len(self._tables), "bytes": self.nbytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+            self._seen.clear()
+            self.nbytes = 0
+
+# 基点 G 的预计算表只需建一次；对端公钥的表由 PEER_TABLE_CACHE 按需建立
+G_WIDTH = 7
+G_TABLE = build_wnaf_table((Gx, Gy), G_WIDTH)
+PEER_TABLE_CACHE = PointTableCache()
+
 # =============================================================
 
-# SM2Key 类和其中的方法保持原样，它们会自动调用上面优化后的 scalar_mult 函数
+# -- Z 值缓存 --
+@lru_cache(maxsize=64)
+def _z_prefix_state(user_id: str) -> SM3Hash:
+    """ENTL‖ID‖a‖b‖Gx‖Gy 只与 user_id 有关，压缩一次后保存 SM3 中间状态"""
+    user_id_bytes = user_id.encode('utf-8')
+    entl = (len(user_id_bytes) * 8).to_bytes(2, 'big')
+    return SM3Hash(entl + user_id_bytes + A.to_bytes(32, 'big') + B.to_bytes(32, 'big')
+                   + Gx.to_bytes(32, 'big') + Gy.to_bytes(32, 'big'))
+
+@lru_cache(maxsize=1024)
+def compute_z(user_id: str, px: int, py: int) -> bytes:
+    """Z = SM3(ENTL‖ID‖a‖b‖Gx‖Gy‖Px‖Py)，按 (user_id, 公钥) 缓存；未命中时只需压缩 Px‖Py 所在的分组"""
+    h = _z_prefix_state(user_id).copy()
+    h.update(px.to_bytes(32, 'big') + py.to_bytes(32, 'big'))
+    return h.digest()
+
+# SM2Key 类调用上面优化后的 scalar_mult：基点使用 G_TABLE，对端公钥使用 PEER_TABLE_CACHE
 class SM2Key:
-    def __init__(self, private_key: int = None, public_key: Point = None):
+    def __init__(self, private_key: int = None, public_key: Point = None, nonce_pool=None):
         self.G = (Gx, Gy)
+        self.nonce_pool = nonce_pool  # 可选的 (k, x1) 预计算池，见 SM2_nonce.NoncePool
         if private_key:
             self.private_key = private_key
-            self.public_key = scalar_mult(private_key, self.G)
+            self.public_key = scalar_mult(private_key, self.G, table=G_TABLE)
         elif public_key:
             self.public_key = public_key
             self.private_key = None
         else:
             self.private_key = random.randrange(1, N)
-            self.public_key = scalar_mult(self.private_key, self.G)
+            self.public_key = scalar_mult(self.private_key, self.G, table=G_TABLE)
 
     def _get_z(self, user_id: str) -> bytes:
-        user_id_bytes = user_id.encode('utf-8')
-        entl = (len(user_id_bytes) * 8).to_bytes(2, 'big')
-        data_to_hash = entl + user_id_bytes
-        data_to_hash += A.to_bytes(32, 'big') + B.to_bytes(32, 'big')
-        data_to_hash += Gx.to_bytes(32, 'big') + Gy.to_bytes(32, 'big')
-        data_to_hash += self.public_key[0].to_bytes(32, 'big')
-        data_to_hash += self.public_key[1].to_bytes(32, 'big')
-        return get_hash(data_to_hash)
+        return compute_z(user_id, self.public_key[0], self.public_key[1])
 
     def sign(self, message: bytes, user_id: str = "1234567812345678") -> Tuple[int, int]:
         if not self.private_key: raise ValueError("Private key is not available for signing.")
@@ -156,8 +310,11 @@ class SM2Key:
         m_prime = z + message
         e = int.from_bytes(get_hash(m_prime), 'big')
         while True:
-            k = random.randrange(1, N) # k的生成方式保持原样
-            x1, y1 = scalar_mult(k, self.G)
+            if self.nonce_pool is not None:
+                k, x1 = self.nonce_pool.take()  # 每对只会取出一次，r 不合法时直接换下一对
+            else:
+                k = random.randrange(1, N) # k的生成方式保持原样
+                x1, y1 = scalar_mult(k, self.G, table=G_TABLE)
             r = (e + x1) % N
             if r == 0 or r + k == N: continue
             d = self.private_key
@@ -173,19 +330,26 @@ class SM2Key:
         e = int.from_bytes(get_hash(m_prime), 'big')
         t = (r + s) % N
         if t == 0: return False
-        p1 = scalar_mult(s, self.G)
-        p2 = scalar_mult(t, self.public_key)
+        p1 = scalar_mult(s, self.G, table=G_TABLE)
+        p2 = scalar_mult(t, self.public_key, table=PEER_TABLE_CACHE.get(self.public_key))
         x, y = point_add(p1, p2)
         R = (e + x) % N
         return R == r
 
-    def encrypt(self, plain_bytes: bytes) -> bytes:
+    def public_bytes(self, compressed: bool = True) -> bytes:
+        return point_to_bytes(self.public_key, compressed)
+
+    @classmethod
+    def from_public_bytes(cls, data: bytes) -> 'SM2Key':
+        return cls(public_key=point_from_bytes(bytes(data)))
+
+    def encrypt(self, plain_bytes: bytes, compressed: bool = False) -> bytes:
+        """compressed=True 时 C1 使用 33 字节压缩编码"""
         while True:
             k = random.randrange(1, N) # k的生成方式保持原样
-            c1_point = scalar_mult(k, self.G)
-            x1, y1 = c1_point
-            c1 = x1.to_bytes(32, 'big') + y1.to_bytes(32, 'big')
-            x2, y2 = scalar_mult(k, self.public_key)
+            c1_point = scalar_mult(k, self.G, table=G_TABLE)
+            c1 = point_to_bytes(c1_point, compressed)
+            x2, y2 = scalar_mult(k, self.public_key, table=PEER_TABLE_CACHE.get(self.public_key))
             kdf_input = x2.to_bytes(32, 'big') + y2.to_bytes(32, 'big')
             t = get_hash(kdf_input) # KDF方式保持原样
             c2 = bytes(p_byte ^ t_byte for p_byte, t_byte in zip(plain_bytes, t))
@@ -193,13 +357,12 @@ class SM2Key:
             c3 = get_hash(c3_input)
             return c1 + c3 + c2
 
-    def decrypt(self, cipher_bytes: bytes) -> bytes:
+    def decrypt(self, cipher_bytes: bytes, compressed: bool = False) -> bytes:
         if not self.private_key: raise ValueError("Private key is not available for decryption.")
-        c1_len, c3_len = 64, 32
+        c1_len, c3_len = (33 if compressed else 64), 32
         c1, c3, c2 = cipher_bytes[:c1_len], cipher_bytes[c1_len:c1_len+c3_len], cipher_bytes[c1_len+c3_len:]
-        x1, y1 = int.from_bytes(c1[:32], 'big'), int.from_bytes(c1[32:], 'big')
-        c1_point = (x1, y1)
-        if not is_on_curve(c1_point): raise ValueError("C1 is not a valid point on the curve.")
+        try: c1_point = point_from_bytes(bytes(c1))
+        except ValueError: raise ValueError("C1 is not a valid point on the curve.") from None
         x2, y2 = scalar_mult(self.private_key, c1_point)
         kdf_input = x2.to_bytes(32, 'big') + y2.to_bytes(32, 'big')
         t = get_hash(kdf_input)
@@ -210,6 +373,79 @@ class SM2Key:
         return m_prime
 
 
+
+# -- 运算计数 (按需开启) --
+# count_ops() 期间把模块里的 point_add / inv / build_wnaf_table 以及 SM2Key 的顶层方法
+# 临时替换为计数包装，退出时还原；不开启时没有任何额外开销。
+# 计数对整个进程生效，开启期间其他线程的运算也会被计入。
+# field_mul 按点运算公式折算：点加 3 次、倍点 4 次 (不计乘以小常数)。
+
+_OP_FIELDS = ("field_mul", "field_inv", "point_add", "point_double", "table_build")
+_COUNTED_METHODS = {"__init__": "keygen", "sign": "sign", "verify": "verify",
+                    "encrypt": "encrypt", "decrypt": "decrypt"}
+_active_counter = None
+
+class OpCounter:
+    def __init__(self):
+        self.totals = dict.fromkeys(_OP_FIELDS, 0)
+        self.per_op = {}  # 顶层操作名 -> {"calls": 次数, 各项计数...}
+        self._current = None
+
+    def _bump(self, field: str, n: int = 1) -> None:
+        self.totals[field] += n
+        if self._current is not None: self.per_op[self._current][field] += n
+
+    def report(self) -> dict:
+        return {"totals": dict(self.totals), "per_op": {op: dict(c) for op, c in self.per_op.items()}}
+
+@contextmanager
+def count_ops():
+    """with count_ops() as ops: ...  之后 ops.totals / ops.per_op 给出各项运算次数"""
+    global _active_counter
+    if _active_counter is not None: raise RuntimeError("count_ops() is already active")
+    counter = OpCounter()
+    module = globals()
+    orig_add, orig_inv, orig_build = point_add, inv, build_wnaf_table
+    orig_methods = {name: SM2Key.__dict__[name] for name in _COUNTED_METHODS}
+
+    def counted_add(p1, p2):
+        if p1 is not None and p2 is not None and not (p1[0] == p2[0] and p1[1] != p2[1]):
+            if p1 == p2:
+                counter._bump("point_double"); counter._bump("field_mul", 4)
+            else:
+                counter._bump("point_add"); counter._bump("field_mul", 3)
+        return orig_add(p1, p2)
+
+    def counted_inv(a, n):
+        counter._bump("field_inv")
+        return orig_inv(a, n)
+
+    def counted_build(p, width=5):
+        counter._bump("table_build")
+        return orig_build(p, width)
+
+    def counted_method(method, label):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if counter._current is not None: return method(self, *args, **kwargs)
+            stats = counter.per_op.setdefault(label, dict.fromkeys(("calls",) + _OP_FIELDS, 0))
+            stats["calls"] += 1
+            counter._current = label
+            try: return method(self, *args, **kwargs)
+            finally: counter._current = None
+        return wrapper
+
+    module.update(point_add=counted_add, inv=counted_inv, build_wnaf_table=counted_build)
+    for name, label in _COUNTED_METHODS.items():
+        setattr(SM2Key, name, counted_method(orig_methods[name], label))
+    _active_counter = counter
+    try:
+        yield counter
+    finally:
+        module.update(point_add=orig_add, inv=orig_inv, build_wnaf_table=orig_build)
+        for name, method in orig_methods.items(): setattr(SM2Key, name, method)
+        _active_counter = None
+
 if __name__ == '__main__':
     # 生成密钥对
     sm2_key = SM2Key()
@@ -0,0 +1,117 @@
+import os
+import secrets
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Tuple
+
+from SM2_new import SM2Key, scalar_mult, G_TABLE, Gx, Gy, N
+
+# ==================== [ 离线随机数 k 预计算池 ] ====================
+# 签名中的 k·G 与消息无关，可以提前算好。后台线程用 CSPRNG 生成 k 并计算 x1，
+# 池中数量低于 low_watermark 时补充到 high_watermark；在线签名只取一对 (k, x1)
+# 做 r、s 的模运算。每一对只会被 take() 弹出一次；fork 后子进程会丢弃继承来的池，
+# 避免父子进程用到同一个 k。
+
+class NoncePool:
+    def __init__(self, capacity: int = 256, low_watermark: int = 64, high_watermark: int = None):
+        if not 0 <= low_watermark < capacity: raise ValueError("low_watermark must be in [0, capacity)")
+        self.capacity = capacity
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark or capacity
+        self._pairs = deque()
+        self._lock = threading.Lock()
+        self._refill = threading.Event()
+        self._closed = False
+        self.generated = self.taken = self.misses = 0
+        self._start()
+        _live_pools.add(self)
+
+    def _start(self) -> None:
+        self._refill.set()
+        self._thread = threading.Thread(target=self._run, name="sm2-nonce-pool", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _generate() -> Tuple[int, int]:
+        k = secrets.randbelow(N - 1) + 1
+        x1, _ = scalar_mult(k, (Gx, Gy), table=G_TABLE)
+        return k, x1
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._refill.wait()
+            while not self._closed and len(self._pairs) < self.high_watermark:
+                pair = self._generate()
+                with self._lock:
+                    self._pairs.append(pair)
+                    self.generated += 1
+            self._refill.clear()
+            if len(self._pairs) <= self.low_watermark: self._refill.set()  # 补充期间被取空
+
+    def _reset_after_fork(self) -> None:
+        """子进程不能使用父进程生成的 k：丢弃继承的池并重建锁与补充线程"""
+        self._pairs.clear()
+        self._lock = threading.Lock()
+        self._refill = threading.Event()
+        if not self._closed: self._start()
+
+    def take(self) -> Tuple[int, int]:
+        """取出一对 (k, x1)；池空时当场计算，保证不阻塞也不复用"""
+        with self._lock:
+            pair = self._pairs.popleft() if self._pairs else None
+            self.taken += 1
+            if pair is None: self.misses += 1
+            if len(self._pairs) <= self.low_watermark: self._refill.set()
+        if pair is None: pair = self._generate()  # 在锁外计算，不阻塞其他线程
+        return pair
+
+    def fill(self, timeout: float = None) -> bool:
+        """等待池补充到 high_watermark (用于服务启动时预热)"""
+        self._refill.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while len(self._pairs) < self.high_watermark:
+            if deadline is not None and time.monotonic() > deadline: return False
+            time.sleep(0.001)
+        return True
+
+    def stats(self) -> dict:
+        return {"available": len(self._pairs), "generated": self.generated, "taken": self.taken, "misses": self.misses}
+
+    def close(self) -> None:
+        self._closed = True
+        self._refill.set()
+
+    def __reduce__(self):
+        raise TypeError("NoncePool cannot be pickled: sharing precomputed nonces would reuse k")
+
+_live_pools = weakref.WeakSet()
+
+def _reset_pools_in_child() -> None:
+    for pool in list(_live_pools): pool._reset_after_fork()
+
+os.register_at_fork(after_in_child=_reset_pools_in_child)
+
+
+if __name__ == '__main__':
+    sm2_key = SM2Key()
+    verifier = SM2Key(public_key=sm2_key.public_key)
+    message = b"plaintext"
+
+    start = time.time()
+    for _ in range(50): sm2_key.sign(message)
+    end = time.time()
+    print(f"普通签名平均耗时: {(end - start) / 50 * 1000:.3f} 毫秒")
+
+    pool = NoncePool(capacity=64, low_watermark=16)
+    pool.fill()
+    pooled_key = SM2Key(private_key=sm2_key.private_key, nonce_pool=pool)
+    start = time.time()
+    signatures = [pooled_key.sign(message) for _ in range(50)]
+    end = time.time()
+    print(f"预计算池签名平均耗时: {(end - start) / 50 * 1000:.3f} 毫秒")
+    print(f"验签结果: {'成功' if all(verifier.verify(message, sig) for sig in signatures) else '失败'}")
+    print(f"签名各不相同: {len(set(signatures)) == len(signatures)}")
+    print("池状态:", pool.stats())
+    pool.close()
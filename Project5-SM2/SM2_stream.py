@@ -0,0 +1,153 @@
+import argparse
+import mmap
+import os
+import secrets
+import sys
+import tempfile
+from typing import BinaryIO
+
+from SM2_new import (SM2Key, SM3Hash, Point, Gx, Gy, N, G_TABLE, PEER_TABLE_CACHE,
+                     scalar_mult, is_on_curve)
+
+# ==================== [ 流式 SM2 加解密 ] ====================
+# SM2Key.encrypt 一次性在内存中拼出 C1‖C3‖C2，且只用一个 32 字节的 t 做异或。
+# 这里按固定大小的块处理任意长度的数据，内存占用与文件大小无关：
+#   - 密钥流按 GB/T 32918.4 的 KDF 逐块派生: t_i = SM3(x2‖y2‖ct_i)，ct 从 1 开始；
+#     x2‖y2 恰好是一个分组，压缩一次后保存中间状态，每 32 字节密钥流只需再压缩一个分组
+#   - C3 = SM3(x2‖M‖y2) 用 SM3Hash.update 增量计算
+#   - 输出顺序为 C1‖C2‖C3 (C3 放在末尾，管道上也能单遍写出)
+
+CHUNK_SIZE = 64 * 1024
+C1_LEN, C3_LEN = 64, 32
+
+class KDFStream:
+    """按需产出 KDF 密钥流，块边界处剩余的字节留到下一次"""
+    def __init__(self, x2: int, y2: int):
+        self._prefix = SM3Hash(x2.to_bytes(32, 'big') + y2.to_bytes(32, 'big'))
+        self._counter = 1
+        self._leftover = b''
+
+    def take(self, n: int) -> bytes:
+        parts = [self._leftover]
+        have = len(self._leftover)
+        while have < n:
+            h = self._prefix.copy()
+            h.update(self._counter.to_bytes(4, 'big'))
+            parts.append(h.digest())
+            self._counter += 1
+            have += 32
+        stream = b''.join(parts)
+        self._leftover = stream[n:]
+        return stream[:n]
+
+def _xor(data: bytes, keystream: bytes) -> bytes:
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')).to_bytes(len(data), 'big')
+
+def _read_exact(src: BinaryIO, n: int) -> bytes:
+    data = b''
+    while len(data) < n:
+        chunk = src.read(n - len(data))
+        if not chunk: break
+        data += chunk
+    return data
+
+def encrypt_stream(public_key: Point, src: BinaryIO, dst: BinaryIO, chunk_size: int = CHUNK_SIZE) -> int:
+    """从 src (文件对象或 mmap) 读明文，向 dst 写 C1‖C2‖C3，返回明文长度"""
+    k = secrets.randbelow(N - 1) + 1
+    x1, y1 = scalar_mult(k, (Gx, Gy), table=G_TABLE)
+    x2, y2 = scalar_mult(k, public_key, table=PEER_TABLE_CACHE.get(public_key))
+    dst.write(x1.to_bytes(32, 'big') + y1.to_bytes(32, 'big'))
+    keystream = KDFStream(x2, y2)
+    c3 = SM3Hash(x2.to_bytes(32, 'big'))
+    total = 0
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk: break
+        c3.update(chunk)
+        dst.write(_xor(chunk, keystream.take(len(chunk))))
+        total += len(chunk)
+    c3.update(y2.to_bytes(32, 'big'))
+    dst.write(c3.digest())
+    return total
+
+def decrypt_stream(key: SM2Key, src: BinaryIO, dst: BinaryIO, chunk_size: int = CHUNK_SIZE) -> int:
+    """解密 C1‖C2‖C3，返回明文长度
+
+    明文在校验 C3 之前就已写出；校验失败时抛出 ValueError，调用方应丢弃 dst 中的内容。
+    """
+    if not key.private_key: raise ValueError("Private key is not available for decryption.")
+    c1 = _read_exact(src, C1_LEN)
+    if len(c1) < C1_LEN: raise ValueError("Ciphertext too short.")
+    c1_point = (int.from_bytes(c1[:32], 'big'), int.from_bytes(c1[32:], 'big'))
+    if not is_on_curve(c1_point): raise ValueError("C1 is not a valid point on the curve.")
+    x2, y2 = scalar_mult(key.private_key, c1_point)
+    keystream = KDFStream(x2, y2)
+    c3 = SM3Hash(x2.to_bytes(32, 'big'))
+    tail = b''  # 末尾 32 字节是 C3，始终留在 tail 里
+    total = 0
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk: break
+        data = tail + chunk
+        body, tail = data[:-C3_LEN], data[-C3_LEN:]
+        if body:
+            plain = _xor(body, keystream.take(len(body)))
+            c3.update(plain)
+            dst.write(plain)
+            total += len(body)
+    if len(tail) < C3_LEN: raise ValueError("Ciphertext too short.")
+    c3.update(y2.to_bytes(32, 'big'))
+    if c3.digest() != tail: raise ValueError("Decryption failed. Hash check invalid.")
+    return total
+
+def _open_source(path: str):
+    """普通文件用 mmap 读取，'-' 读标准输入"""
+    if path == '-': return sys.stdin.buffer
+    f = open(path, 'rb')
+    if os.fstat(f.fileno()).st_size == 0: return f
+    with f: return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _run_to_output(func, key, in_path: str, out_path: str, chunk_size: int) -> int:
+    """写到同目录临时文件，成功后再改名，解密校验失败时不会留下未经认证的明文"""
+    src = _open_source(in_path)
+    try:
+        if out_path == '-': return func(key, src, sys.stdout.buffer, chunk_size)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(out_path)))
+        try:
+            with os.fdopen(fd, 'wb') as dst: total = func(key, src, dst, chunk_size)
+            os.replace(tmp_path, out_path)
+            return total
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    finally:
+        if src is not sys.stdin.buffer: src.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="SM2 流式加解密 (C1‖C2‖C3)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("keygen", help="生成密钥对")
+    enc = sub.add_parser("encrypt", help="用公钥加密文件")
+    enc.add_argument("--public-key", required=True, help="十六进制公钥 x‖y (128 个十六进制字符)")
+    dec = sub.add_parser("decrypt", help="用私钥解密文件")
+    dec.add_argument("--private-key", required=True, help="十六进制私钥")
+    for p in (enc, dec):
+        p.add_argument("input", help="输入文件，'-' 为标准输入")
+        p.add_argument("output", help="输出文件，'-' 为标准输出")
+        p.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "keygen":
+        sm2_key = SM2Key()
+        print(f"私钥: {sm2_key.private_key:064x}")
+        print(f"公钥: {sm2_key.public_key[0]:064x}{sm2_key.public_key[1]:064x}")
+    elif args.command == "encrypt":
+        pub = bytes.fromhex(args.public_key)
+        public_key = (int.from_bytes(pub[:32], 'big'), int.from_bytes(pub[32:], 'big'))
+        if len(pub) != 64 or not is_on_curve(public_key): sys.exit("公钥格式错误")
+        total = _run_to_output(encrypt_stream, public_key, args.input, args.output, args.chunk_size)
+        print(f"已加密 {total} 字节", file=sys.stderr)
+    else:
+        sm2_key = SM2Key(private_key=int(args.private_key, 16))
+        total = _run_to_output(decrypt_stream, sm2_key, args.input, args.output, args.chunk_size)
+        print(f"已解密 {total} 字节", file=sys.stderr)
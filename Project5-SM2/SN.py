@@ -1,10 +1,20 @@
 import hashlib
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Tuple
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives.asymmetric import utils
 from cryptography.hazmat.primitives import serialization
 from cryptography.exceptions import InvalidSignature
 
+from ECC import SECP256K1, ecdsa_verify, decode_der_signature
+
 def generate_satoshi_style_keypair() -> (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey):
     # 使用 secp256k1 曲线生成私钥
     private_key = ec.generate_private_key(ec.SECP256K1())
@@ -39,7 +49,96 @@ def verify_signature(public_key: ec.EllipticCurvePublicKey, signature: bytes, me
     except InvalidSignature:
         return False
 
+def verify_signature_pure(public_key_bytes: bytes, signature: bytes, message_hash: bytes) -> bool:
+    """
+    用 ECC.py 中纯 Python 的 secp256k1 (GLV) 引擎验签，便于审计；结果与 verify_signature 一致。
+    """
+    try:
+        public_point = SECP256K1.decode_point(public_key_bytes)
+        return ecdsa_verify(SECP256K1, public_point, message_hash, decode_der_signature(signature))
+    except ValueError:
+        return False
+
+# ==================== [ 批量验签流水线 ] ====================
+# 记录文件每行: "压缩公钥 DER签名 消息"，均为十六进制，空格分隔。
+# 主进程只负责读文件和分块；双 SHA-256 与验签在工作进程中按块批量完成，
+# 反序列化后的公钥对象在每个工作进程内缓存，同一公钥只解析一次。
+
+Record = Tuple[bytes, bytes, bytes]  # (压缩公钥, DER 签名, 消息)
+
+def read_records(lines: Iterable[str]) -> Iterator[Record]:
+    for line in lines:
+        fields = line.split()
+        if not fields or fields[0].startswith('#'): continue  # 只跳过空行和注释行
+        try:
+            if len(fields) != 3: raise ValueError("字段数不为 3")
+            yield bytes.fromhex(fields[0]), bytes.fromhex(fields[1]), bytes.fromhex(fields[2])
+        except ValueError:
+            yield b'', b'', b''  # 格式错误的记录按验签失败处理，保持结果与记录行对应
+
+@lru_cache(maxsize=4096)
+def _load_public_key(public_key_bytes: bytes) -> ec.EllipticCurvePublicKey:
+    return ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), public_key_bytes)
+
+def _verify_chunk(records: List[Record]) -> List[bool]:
+    digests = [hashlib.sha256(hashlib.sha256(message).digest()).digest() for _, _, message in records]
+    algorithm = ec.ECDSA(utils.Prehashed(hashes.SHA256()))
+    results = []
+    for (public_key_bytes, signature, _), message_hash in zip(records, digests):
+        try:
+            _load_public_key(public_key_bytes).verify(signature, message_hash, algorithm)
+            results.append(True)
+        except (InvalidSignature, ValueError):
+            results.append(False)
+    return results
+
+def iter_verify_records(records: Iterable[Record], workers: int = None, chunk_size: int = 1000,
+                        max_in_flight: int = None) -> Iterator[bool]:
+    """按输入顺序产出每条记录的验签结果，最多 max_in_flight 个块在途"""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    records = iter(records)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while True:
+            while len(pending) < max_in_flight:
+                chunk = list(itertools.islice(records, chunk_size))
+                if not chunk: break
+                pending.append(executor.submit(_verify_chunk, chunk))
+            if not pending: return
+            yield from pending.popleft().result()
+
+def verify_record_file(path: str, workers: int = None, chunk_size: int = 1000) -> Tuple[List[bool], dict]:
+    """验证记录文件，返回 (逐条结果, 统计信息)"""
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        results = list(iter_verify_records(read_records(f), workers, chunk_size))
+    elapsed = time.perf_counter() - start
+    stats = {"records": len(results), "valid": sum(results), "seconds": elapsed,
+             "records_per_second": len(results) / elapsed if elapsed else 0.0}
+    return results, stats
+
+def write_demo_records(path: str, count: int, keys: int = 10) -> None:
+    """生成演示用记录文件，每 100 条里混入一条篡改过的消息"""
+    key_pairs = [generate_satoshi_style_keypair() for _ in range(keys)]
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            private_key, public_key = key_pairs[i % keys]
+            message = f"tx-{i}".encode()
+            signature = sign_message(private_key, hash_message_for_signing(message))
+            if i % 100 == 99: message += b"!"
+            public_key_bytes = public_key.public_bytes(serialization.Encoding.X962, serialization.PublicFormat.CompressedPoint)
+            f.write(f"{public_key_bytes.hex()} {signature.hex()} {message.hex()}\n")
+
 if __name__ == '__main__':
+    if len(sys.argv) >= 3 and sys.argv[1] == 'verify-file':
+        # python SN.py verify-file 记录文件 [进程数]；记录文件不存在时先生成 10000 条演示数据
+        if not os.path.exists(sys.argv[2]): write_demo_records(sys.argv[2], 10000)
+        results, stats = verify_record_file(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else None)
+        print(f"共 {stats['records']} 条记录，验签通过 {stats['valid']} 条，失败 {stats['records'] - stats['valid']} 条")
+        print(f"耗时 {stats['seconds']:.3f} 秒，吞吐 {stats['records_per_second']:.0f} 条/秒")
+        sys.exit(0)
+
     print("===模仿中本聪数字签名过程===")
 
     satoshi_imitation_private_key, satoshi_imitation_public_key = generate_satoshi_style_keypair()
@@ -73,6 +172,12 @@ if __name__ == '__main__':
         print("验证成功")
     else:
         print("验证失败")
+
+    # 纯 Python 引擎交叉验证
+    public_key_bytes = bytes.fromhex(public_key_hex)
+    pure_public_key = SECP256K1.encode_point(SECP256K1.scalar_mult(satoshi_imitation_private_key.private_numbers().private_value, SECP256K1.G))
+    print(f"纯 Python 引擎推导的公钥一致: {pure_public_key == public_key_bytes}")
+    print(f"纯 Python 引擎验签: {'成功' if verify_signature_pure(public_key_bytes, signature, message_hash) else '失败'}")
         
     #篡改签名
     print("===篡改签名验证===")
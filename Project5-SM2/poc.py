@@ -1,7 +1,10 @@
 import hmac
 import math
+import sys
 import time
-from typing import Tuple, Union, List
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union, List
+
+from arith import invert
 
 P = 0xFFFFFFFE_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_00000000_FFFFFFFF_FFFFFFFF
 A = 0xFFFFFFFE_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_00000000_FFFFFFFF_FFFFFFFC
@@ -37,11 +40,8 @@ def sm3_hash(data: bytes) -> bytes:
         iv = [(iv[k] ^ [a,b,c,d,e,f,g,h][k]) & 0xFFFFFFFF for k in range(8)]
     return b''.join(x.to_bytes(4, 'big') for x in iv)
 def inv(a: int, n: int) -> int:
-    if a == 0: raise ZeroDivisionError("inverse of 0 does not exist")
-    lm, hm, low, high = 1, 0, a % n, n
-    while low > 1:
-        r = high // low; nm, new = hm - lm * r, high - low * r; lm, low, hm, high = nm, new, lm, low
-    return lm % n
+    if a % n == 0: raise ZeroDivisionError("inverse of 0 does not exist")
+    return invert(a, n)
 def point_add(p1: Point, p2: Point) -> Union[Point, None]:
     if p1 is None: return p2
     if p2 is None: return p1
@@ -103,8 +103,113 @@ def recover_private_key(sig1: Tuple[int, int], sig2: Tuple[int, int], msg1_hash:
     recovered_d = (s1_minus_s2 * term2_inv) % N
     return recovered_d
 
+# ==================== [ 大规模签名库中的 k 重用扫描 ] ====================
+# 同一签名者重用 k 时 x1 = (r - e) mod n 相同，因此按 (公钥, x1) 建哈希索引即可在 O(n) 内
+# 找出候选签名对，无需两两比较。候选对攒成一批后用 Montgomery 技巧只做一次求逆，
+# 恢复出的 d 用 d·G 是否等于公钥来确认。
+# 记录格式：每行 "公钥(x‖y 十六进制) r s e"，字段用空格或逗号分隔，r/s/e 为十六进制。
+# 格式错误的行不会中断扫描，计入 skipped 后跳过。
+
+SignatureRecord = Tuple[str, int, int, int]  # (公钥十六进制, r, s, e)
+
+def read_signature_records(lines: Iterable[str]) -> Iterator[Optional[SignatureRecord]]:
+    """格式错误的记录产生 None，只跳过空行和注释行"""
+    for line in lines:
+        fields = line.replace(',', ' ').split()
+        if not fields or fields[0].startswith('#'): continue
+        try:
+            if len(fields) != 4: raise ValueError("字段数不为 4")
+            pubkey_hex = fields[0].lower()
+            if len(pubkey_hex) == 130 and pubkey_hex.startswith('04'): pubkey_hex = pubkey_hex[2:]
+            if len(pubkey_hex) != 128: raise ValueError("公钥长度错误")
+            bytes.fromhex(pubkey_hex)  # 公钥在这里检查，flush 中不会再出错
+            yield pubkey_hex, int(fields[1], 16), int(fields[2], 16), int(fields[3], 16)
+        except ValueError:
+            yield None
+
+def batch_inv(values: List[int], n: int) -> List[int]:
+    """Montgomery 批量求逆：k 个逆元只需 1 次求逆 + 3(k-1) 次乘法"""
+    prefix, acc = [], 1
+    for v in values:
+        prefix.append(acc)
+        acc = acc * v % n
+    acc_inv = inv(acc, n)
+    result = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        result[i] = prefix[i] * acc_inv % n
+        acc_inv = acc_inv * values[i] % n
+    return result
+
+def _parse_public_key(pubkey_hex: str) -> Point:
+    raw = bytes.fromhex(pubkey_hex)
+    return int.from_bytes(raw[:32], 'big'), int.from_bytes(raw[32:], 'big')
+
+class NonceReuseScanner:
+    def __init__(self, batch_size: int = 1024):
+        self.batch_size = batch_size
+        self.index: Dict[str, Dict[int, Tuple[int, int]]] = {}  # 公钥 -> {x1: (r, s)}
+        self.compromised: Dict[str, int] = {}  # 公钥 -> 恢复出的私钥
+        self.records = 0
+        self.skipped = 0  # 格式错误而跳过的记录
+        self.candidates = 0
+        self._pending: List[Tuple[str, Tuple[int, int], Tuple[int, int]]] = []
+
+    def add(self, record: Optional[SignatureRecord]) -> None:
+        if record is None:
+            self.skipped += 1
+            return
+        pubkey_hex, r, s, e = record
+        self.records += 1
+        if pubkey_hex in self.compromised: return
+        x1 = (r - e) % N
+        seen = self.index.setdefault(pubkey_hex, {})
+        first = seen.get(x1)
+        if first is None:
+            seen[x1] = (r, s)
+        elif first != (r, s):
+            self.candidates += 1
+            self._pending.append((pubkey_hex, first, (r, s)))
+            if len(self._pending) >= self.batch_size: self.flush()
+
+    def flush(self) -> None:
+        """批量恢复候选对的私钥并用公钥确认；k 与 n-k 的 x1 也相同，两种情形都尝试"""
+        pending = [item for item in self._pending if item[0] not in self.compromised]
+        self._pending = []
+        if not pending: return
+        same_k = [(s2 + r2 - s1 - r1) % N or 1 for _, (r1, s1), (r2, s2) in pending]
+        negated_k = [(s1 + r1 + s2 + r2) % N or 1 for _, (r1, s1), (r2, s2) in pending]
+        inverses = batch_inv(same_k + negated_k, N)
+        for i, (pubkey_hex, (r1, s1), (r2, s2)) in enumerate(pending):
+            if pubkey_hex in self.compromised: continue
+            public_key = _parse_public_key(pubkey_hex)
+            for d in ((s1 - s2) * inverses[i] % N, -(s1 + s2) * inverses[len(pending) + i] % N):
+                if d and scalar_mult(d, (Gx, Gy)) == public_key:
+                    self.compromised[pubkey_hex] = d
+                    self.index.pop(pubkey_hex, None)
+                    break
+
+    def scan(self, records: Iterable[Optional[SignatureRecord]]) -> Dict[str, int]:
+        for record in records: self.add(record)
+        self.flush()
+        return self.compromised
+
+def scan_signature_file(path: str, batch_size: int = 1024) -> NonceReuseScanner:
+    scanner = NonceReuseScanner(batch_size)
+    with open(path, 'r', encoding='utf-8') as f:
+        scanner.scan(read_signature_records(f))
+    return scanner
+
 if __name__ == '__main__':
-    
+    if len(sys.argv) == 3 and sys.argv[1] == 'scan':
+        start = time.time()
+        scanner = scan_signature_file(sys.argv[2])
+        end = time.time()
+        print(f"扫描 {scanner.records} 条签名 (格式错误跳过 {scanner.skipped} 条)，候选签名对 {scanner.candidates} 个，耗时 {end - start:.3f} 秒")
+        for pubkey_hex, d in scanner.compromised.items():
+            print(f"公钥 {pubkey_hex} 已泄露，私钥: {hex(d)}")
+        if not scanner.compromised: print("未发现 k 重用")
+        sys.exit(0)
+
     # 生成一个密钥对
     victim_d = int.from_bytes(b'This is a very secret key_12345', 'big') % (N-1) + 1
     victim_pk = scalar_mult(victim_d, (Gx, Gy))
@@ -0,0 +1,76 @@
+import os
+import random
+import time
+from typing import Callable, Dict
+
+# ==================== [ 大整数运算后端 ] ====================
+# powmod / invert / mulmod 在导入时选定实现：装有 gmpy2 时用 GMP，否则退回内置 int。
+# 环境变量 ARITH_BACKEND=python 可强制使用纯 Python 实现 (对比测试用)。
+# 返回值总是内置 int，调用方不需要关心 mpz 类型。
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+def _py_powmod(b: int, e: int, m: int) -> int:
+    return pow(b, e, m)
+
+def _py_invert(a: int, m: int) -> int:
+    try:
+        return pow(a, -1, m)
+    except ValueError:
+        raise ZeroDivisionError("inverse does not exist") from None
+
+def _py_mulmod(a: int, b: int, m: int) -> int:
+    return a * b % m
+
+PYTHON: Dict[str, Callable] = {"powmod": _py_powmod, "invert": _py_invert, "mulmod": _py_mulmod}
+
+if gmpy2 is not None:
+    def _gmp_powmod(b: int, e: int, m: int) -> int:
+        return int(gmpy2.powmod(b, e, m))
+
+    def _gmp_invert(a: int, m: int) -> int:
+        return int(gmpy2.invert(a, m))  # 不可逆时抛出 ZeroDivisionError
+
+    def _gmp_mulmod(a: int, b: int, m: int) -> int:
+        return int(gmpy2.mpz(a) * b % m)
+
+    GMPY2: Dict[str, Callable] = {"powmod": _gmp_powmod, "invert": _gmp_invert, "mulmod": _gmp_mulmod}
+else:
+    GMPY2 = None
+
+if GMPY2 is not None and os.environ.get("ARITH_BACKEND", "gmpy2") != "python":
+    BACKEND, _impl = "gmpy2", GMPY2
+else:
+    BACKEND, _impl = "python", PYTHON
+powmod, invert, mulmod = _impl["powmod"], _impl["invert"], _impl["mulmod"]
+
+def _bench(impl: Dict[str, Callable], bits: int, repeat: int) -> Dict[str, float]:
+    """各运算的平均耗时 (微秒)"""
+    rng = random.Random(bits)
+    m = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+    values = [rng.randrange(2, m) for _ in range(64)]
+    cases = {"powmod": (lambda a, b: impl["powmod"](a, b, m), max(1, repeat // 100)),
+             "invert": (lambda a, b: impl["invert"](a, m), max(1, repeat // 10)),
+             "mulmod": (lambda a, b: impl["mulmod"](a, b, m), repeat)}
+    result = {}
+    for name, (func, n) in cases.items():
+        start = time.perf_counter()
+        for i in range(n):
+            try: func(values[i % 64], values[(i + 1) % 64])
+            except ZeroDivisionError: pass
+        result[name] = (time.perf_counter() - start) / n * 1e6
+    return result
+
+if __name__ == '__main__':
+    print(f"当前后端: {BACKEND}")
+    backends = {"python": PYTHON}
+    if GMPY2 is not None: backends["gmpy2"] = GMPY2
+    for bits in (256, 2048):
+        timings = {name: _bench(impl, bits, 20000) for name, impl in backends.items()}
+        for op in ("powmod", "invert", "mulmod"):
+            line = f"{bits:>5} 位 {op:<7}" + "".join(f"{name:>8}: {t[op]:>10.2f} 微秒" for name, t in timings.items())
+            if "gmpy2" in timings: line += f"   加速 {timings['python'][op] / timings['gmpy2'][op]:.1f}x"
+            print(line)
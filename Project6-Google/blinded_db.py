@@ -0,0 +1,263 @@
+import heapq
+import itertools
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from arith import invert
+from group import group_params, group_from_params
+from bucket import bucket_id
+
+# 服务器端预计算的盲化哈希库：H(w)^k2 只在入库时计算一次，会话中直接读取。
+# 数据文件 (path): 32 字节文件头 + 定长记录，记录按字节序排序
+#   记录 = 桶号(4) ‖ H(w)^k2 (group.element_size) ‖ 价值 t (8 字节有符号)
+#   排序后同一个桶的记录连续存放，分桶模式下按桶号二分查找
+# 元数据 (path + ".meta"): 群参数、k2、前缀位数、密钥轮换次数 epoch，文件权限 0600
+#   数据文件头也记录 epoch，打开时两者必须一致。轮换先把新密钥作为 next_key/next_epoch 写入元数据，
+#   再替换数据文件，最后写入只含新密钥的元数据；中途崩溃时按数据文件头的 epoch 选用对应的密钥。
+# 新增条目先进入内存中的待合并列表，达到 merge_threshold 后与数据文件归并写出新文件；
+# 轮换 k2 时后台线程把每条记录提升到 k_new·k_old⁻¹ 次幂写出新文件，完成后原子替换，期间照常提供查询。
+
+_HEADER = struct.Struct(">4sBHQI")
+_HEADER_SIZE = 32
+_MAGIC = b"PCDB"
+_VERSION = 1
+_VALUE = struct.Struct(">q")
+
+def _invertible_exponent(group): # 轮换需要 k⁻¹ mod 群阶
+    while True:
+        k = group.random_exponent()
+        if math.gcd(k, group.order) == 1: return k
+
+def _write_atomic(path, chunks):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        for chunk in chunks: f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class DBView:
+    """某一时刻数据文件与 k2 的只读快照：会话全程使用同一个快照，不受插入和轮换影响"""
+    def __init__(self, path, key, group, pending=()):
+        self.key = key
+        self.group = group
+        self.element_size = group.element_size
+        self.record_size = 4 + self.element_size + _VALUE.size
+        with open(path, "rb") as f:
+            magic, version, element_size, self.count, self.epoch = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION or element_size != self.element_size:
+                raise ValueError("数据文件格式不匹配")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+        self.pending = sorted(pending)
+
+    def _record(self, i):
+        off = _HEADER_SIZE + i * self.record_size
+        return self._mm[off:off + self.record_size]
+
+    def _lower_bound(self, prefix): # 第一个桶号 >= prefix 的记录下标
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off = _HEADER_SIZE + mid * self.record_size
+            if self._mm[off:off + 4] < prefix: lo = mid + 1
+            else: hi = mid
+        return lo
+
+    def _decode(self, record): # -> (H(w)^k2 编码, t)
+        return record[4:4 + self.element_size], _VALUE.unpack_from(record, 4 + self.element_size)[0]
+
+    def records(self): # 全部原始记录 (字节串)，与待合并条目归并
+        return heapq.merge((self._record(i) for i in range(self.count)), self.pending)
+
+    def __iter__(self):
+        return (self._decode(r) for r in self.records())
+
+    def __len__(self):
+        return self.count + len(self.pending)
+
+    def select(self, prefixes): # 分桶模式：取出若干桶内的 (H(w)^k2 编码, t)
+        for b in sorted(prefixes):
+            prefix = b.to_bytes(4, 'big')
+            if self.count:
+                i = self._lower_bound(prefix)
+                while i < self.count:
+                    record = self._record(i)
+                    if record[:4] != prefix: break
+                    yield self._decode(record)
+                    i += 1
+            for record in self.pending:
+                if record[:4] == prefix: yield self._decode(record)
+
+class BlindedHashDB:
+    def __init__(self, path, merge_threshold=4096, workers=None):
+        self.path = path
+        self.merge_threshold = merge_threshold
+        self.workers = workers  # 入库时并行模幂的进程数，见 parallel.py
+        with open(path + ".meta", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.group = group_from_params(meta)
+        self.key = int(meta["key"], 16)
+        self.prefix_bits = meta["prefix_bits"]
+        self.epoch = meta["epoch"]
+        self._pending = []
+        self._lock = threading.RLock()
+        self._rotation = None
+        self._view = DBView(path, self.key, self.group)
+        if self._view.epoch != self.epoch:
+            if self._view.epoch != meta.get("next_epoch"):
+                raise ValueError(f"数据文件的轮换次数 {self._view.epoch} 与元数据 {self.epoch} 不一致")
+            # 轮换已替换数据文件但没来得及写入新元数据：数据已是新密钥下的值
+            self.key, self.epoch = int(meta["next_key"], 16), self._view.epoch
+            self._write_meta(path, self.group, self.key, self.prefix_bits, self.epoch)
+            self._view = DBView(path, self.key, self.group)
+        elif "next_key" in meta:  # 轮换在替换数据文件之前中断，数据仍是旧密钥下的值
+            self._write_meta(path, self.group, self.key, self.prefix_bits, self.epoch)
+
+    @classmethod
+    def create(cls, path, group, items=(), prefix_bits=0, key=None, **kwargs):
+        """新建库 (覆盖已有文件)，items 为 (密码, 价值)"""
+        key = _invertible_exponent(group) if key is None else key
+        if math.gcd(key, group.order) != 1: raise ValueError("k2 必须与群阶互素才能轮换")
+        _write_atomic(path, [_HEADER.pack(_MAGIC, _VERSION, group.element_size, 0, 0).ljust(_HEADER_SIZE, b'\0')])
+        cls._write_meta(path, group, key, prefix_bits, 0)
+        db = cls(path, **kwargs)
+        db.insert(items)
+        db.flush()
+        return db
+
+    @staticmethod
+    def _write_meta(path, group, key, prefix_bits, epoch, next_key=None):
+        meta = dict(group_params(group), key=format(key, "x"), prefix_bits=prefix_bits, epoch=epoch)
+        if next_key is not None: meta.update(next_key=format(next_key, "x"), next_epoch=epoch + 1)  # 轮换进行中
+        tmp = path + ".meta.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)  # 含私钥 k2
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path + ".meta")
+
+    def _blind(self, passwords, key): # [H(w)^key 编码]
+        if self.workers:
+            from parallel import ParallelExp
+            pool = ParallelExp(self.group, key, self.workers)
+            try: values = pool.hash_exp(passwords)
+            finally: pool.close()
+        else:
+            values = [self.group.exp(self.group.hash_to_group(w), key) for w in passwords]
+        return [self.group.encode(x) for x in values]
+
+    def insert(self, items):
+        """新增泄露条目：只对新条目求幂，达到 merge_threshold 后归并到数据文件"""
+        items = list(items)
+        if not items: return
+        with self._lock:
+            key = self.key
+        records = [bucket_id(w, self.prefix_bits).to_bytes(4, 'big') + e + _VALUE.pack(t)
+                   for (w, t), e in zip(items, self._blind([w for w, _ in items], key))]
+        with self._lock:
+            if key != self.key:  # 计算期间完成了轮换
+                records = self._reblind(records, self.key, key)
+            self._pending.extend(records)
+            self._view = DBView(self.path, self.key, self.group, self._pending)
+            if len(self._pending) >= self.merge_threshold and self._rotation is None: self.flush()
+
+    def flush(self):
+        """把待合并条目归并进数据文件 (轮换进行中时推迟到轮换结束)"""
+        with self._lock:
+            if not self._pending or self._rotation is not None: return
+            view = DBView(self.path, self.key, self.group, self._pending)
+            self._write(self.path, view.records(), len(view), self.epoch)
+            self._pending = []
+            self._view = DBView(self.path, self.key, self.group)
+
+    def _write(self, path, records, count, epoch):
+        header = _HEADER.pack(_MAGIC, _VERSION, self.group.element_size, count, epoch).ljust(_HEADER_SIZE, b'\0')
+        _write_atomic(path, itertools.chain([header], records))
+
+    def snapshot(self):
+        with self._lock:
+            return self._view
+
+    def _reblind(self, records, new_key, old_key): # 记录中的 H(w)^old 提升为 H(w)^new，按桶重新排序
+        ratio = new_key * invert(old_key, self.group.order) % self.group.order
+        size = self.group.element_size
+        out = [r[:4] + self.group.encode(self.group.exp(self.group.decode(r[4:4 + size]), ratio)) + r[4 + size:]
+               for r in records]
+        out.sort()
+        return out
+
+    def rotate(self, new_key=None, background=True):
+        """轮换 k2；background=True 时立即返回后台线程，旧密钥在替换前继续提供服务"""
+        with self._lock:
+            if self._rotation is not None: raise RuntimeError("已有轮换正在进行")
+            new_key = _invertible_exponent(self.group) if new_key is None else new_key
+            if math.gcd(new_key, self.group.order) != 1: raise ValueError("k2 必须与群阶互素才能轮换")
+            self.flush()
+            self._rotation = threading.Thread(target=self._rotate, args=(self._view, new_key), name="pcdb-rotate", daemon=True)
+            self._rotation.start()
+            thread = self._rotation
+        if not background: thread.join()
+        return thread
+
+    def _rotate(self, view, new_key):
+        try:
+            tmp = self.path + ".rotate"
+            def records(): # 同一桶的记录连续存放，逐桶处理，内存只与最大桶大小有关
+                bucket, batch = None, []
+                for r in view.records():
+                    if r[:4] != bucket and batch:
+                        yield from self._reblind(batch, new_key, view.key)
+                        batch = []
+                    bucket = r[:4]
+                    batch.append(r)
+                yield from self._reblind(batch, new_key, view.key)
+            self._write(tmp, records(), len(view), view.epoch + 1)
+            with self._lock:
+                self._pending = self._reblind(self._pending, new_key, view.key)
+                self._write_meta(self.path, self.group, view.key, self.prefix_bits, view.epoch, next_key=new_key)
+                os.replace(tmp, self.path)
+                self._write_meta(self.path, self.group, new_key, self.prefix_bits, view.epoch + 1)
+                self.key, self.epoch = new_key, view.epoch + 1
+                self._view = DBView(self.path, self.key, self.group, self._pending)
+        finally:
+            with self._lock:
+                self._rotation = None
+
+    def stats(self):
+        view = self.snapshot()
+        return {"records": len(view), "pending": len(view.pending), "epoch": view.epoch,
+                "prefix_bits": self.prefix_bits, "group": self.group.name,
+                "bytes": os.path.getsize(self.path), "rotating": self._rotation is not None}
+
+
+if __name__ == "__main__":
+    import tempfile
+    from group import ECGroup
+
+    group = ECGroup()
+    path = os.path.join(tempfile.mkdtemp(), "breach.pcdb")
+    items = [(f"password-{i}", i) for i in range(500)]
+
+    start = time.time()
+    db = BlindedHashDB.create(path, group, items, prefix_bits=4)
+    print(f"建库 {len(items)} 条: {time.time() - start:.3f} 秒", db.stats())
+
+    start = time.time()
+    db = BlindedHashDB(path)
+    print(f"重新打开 (无需求幂): {time.time() - start:.4f} 秒")
+    h = group.encode(group.exp(group.hash_to_group("password-7"), db.key))
+    print("查询正确:", (h, 7) in list(db.snapshot().select([bucket_id("password-7", 4)])))
+
+    db.insert([("password-new", 42)])
+    old = db.snapshot()
+    start = time.time()
+    db.rotate(background=True).join()
+    print(f"轮换 k2: {time.time() - start:.3f} 秒", db.stats())
+    h = group.encode(group.exp(group.hash_to_group("password-new"), db.key))
+    print("轮换后查询正确:", (h, 42) in list(db.snapshot()), "，旧快照仍可读:", len(old) == len(items) + 1)
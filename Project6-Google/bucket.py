@@ -0,0 +1,51 @@
+import hashlib
+import math
+import struct
+from collections import defaultdict
+
+# 分桶 (k-匿名前缀) 模式：客户端先公开每个密码哈希的前 prefix_bits 位，
+# 服务器只对这些桶内的条目求幂、加密并发送，单次查询的开销与桶大小而非整个泄露库成正比。
+# 代价是向服务器暴露前缀：每个前缀对应约 N / 2^prefix_bits 个泄露条目 (k-匿名)，
+# 前缀与 hash_to_group 使用不同的域分隔，不会泄露盲化所用的哈希值。
+
+_PREFIX = struct.Struct(">I")
+MAX_PREFIX_BITS = 32
+
+def bucket_id(password, prefix_bits): # SHA256("bucket"‖w) 的前 prefix_bits 位
+    if prefix_bits == 0: return 0
+    digest = hashlib.sha256(b"bucket" + password.encode()).digest()
+    return int.from_bytes(digest[:4], 'big') >> (32 - prefix_bits)
+
+def choose_prefix_bits(total, bucket_size): # 使平均桶大小接近 bucket_size
+    if total <= bucket_size: return 0
+    return min(MAX_PREFIX_BITS, round(math.log2(total / bucket_size)))
+
+def encode_prefixes(prefixes):
+    return b''.join(_PREFIX.pack(b) for b in sorted(prefixes))
+
+def decode_prefixes(data):
+    if len(data) % _PREFIX.size: raise ValueError("前缀列表长度非法")
+    return {v for v, in _PREFIX.iter_unpack(data)}
+
+class BucketIndex:
+    """服务器端按前缀分桶的 (密码, 价值) 索引"""
+    def __init__(self, items=(), prefix_bits=16):
+        if not 0 <= prefix_bits <= MAX_PREFIX_BITS: raise ValueError("prefix_bits 取值范围为 0~32")
+        self.prefix_bits = prefix_bits
+        self.buckets = defaultdict(list)
+        self.size = 0
+        for item in items: self.add(item)
+
+    def add(self, item): # item = (password, value)
+        self.buckets[bucket_id(item[0], self.prefix_bits)].append(item)
+        self.size += 1
+
+    def select(self, prefixes): # 取出客户端所报前缀对应的全部条目
+        for b in prefixes:
+            if not 0 <= b < (1 << self.prefix_bits): raise ValueError("前缀超出范围")
+            yield from self.buckets.get(b, ())
+
+    def stats(self):
+        sizes = [len(v) for v in self.buckets.values()]
+        return {"prefix_bits": self.prefix_bits, "entries": self.size, "buckets": len(sizes),
+                "avg_bucket": self.size / (1 << self.prefix_bits), "max_bucket": max(sizes, default=0)}
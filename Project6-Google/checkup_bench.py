@@ -0,0 +1,176 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from phe import paillier
+from phe.paillier import EncryptedNumber
+
+from group import ModPGroup, SafePrimeGroup, ECGroup
+from paillier_pool import PaillierRandomPool
+from ec_elgamal import ElGamalPublicKey, ElGamalPrivateKey, ElGamalCiphertext
+from zfilter import BloomFilter
+from checkup_net import goole_password, ciphertext_size
+
+# ==================== [ 协议插桩与基准测试 ] ====================
+# with instrument() as metrics: 期间 P1/P2 每一轮记录墙钟时间、群上求幂次数、哈希到群次数、
+# 同态加密 (Paillier 或 EC ElGamal) 的加密/同态加法/解密次数，以及该轮输出按 checkup_net 线格式序列化后的字节数。
+# 设置了 workers 时子进程内的运算不计入 (只统计主进程)；modexp 也包含 EC ElGamal 加解密内部的标量乘。
+
+Func, P1, P2 = goole_password.Func, goole_password.P1, goole_password.P2
+_FIELDS = ("wall_s", "modexp", "hash_to_group", "he_encrypt", "he_add", "he_decrypt", "bytes_out")
+_ROUNDS = {P1: ("round1", "round2", "round3"), P2: ("round1", "round2", "round3")}
+_SENDING = {"P1.round1", "P2.round2", "P1.round3"}  # 返回值即发给对方的消息
+_active = None
+
+def _is_element(value):
+    return isinstance(value, int) or (isinstance(value, tuple) and len(value) == 2 and all(isinstance(v, int) for v in value))
+
+def wire_size(value, group):
+    """value 按 checkup_net 格式发送时的字节数 (不含帧头)"""
+    if value is None: return 1
+    if isinstance(value, (EncryptedNumber, ElGamalCiphertext)): return ciphertext_size(value.public_key)
+    if isinstance(value, BloomFilter): return value.nbytes()
+    if _is_element(value): return group.element_size
+    if isinstance(value, (list, tuple, set, frozenset)): return sum(wire_size(v, group) for v in value)
+    raise TypeError(f"无法估计 {type(value).__name__} 的序列化大小")
+
+class ProtocolMetrics:
+    def __init__(self):
+        self.rounds = {}  # "P1.round1" -> {"calls": 次数, 各项计数...}
+        self._current = None
+
+    def _bump(self, field, n=1):
+        if self._current is not None: self.rounds[self._current][field] += n
+
+    def totals(self):
+        total = dict.fromkeys(_FIELDS, 0)
+        for stats in self.rounds.values():
+            for field in _FIELDS: total[field] += stats[field]
+        return total
+
+    def report(self):
+        return {"rounds": {name: dict(stats) for name, stats in self.rounds.items()}, "totals": self.totals()}
+
+@contextmanager
+def instrument():
+    """with instrument() as metrics: ...  之后 metrics.rounds 给出每一轮的时间与计数"""
+    global _active
+    if _active is not None: raise RuntimeError("instrument() is already active")
+    metrics = ProtocolMetrics()
+    patched = []  # (对象, 属性名, 原值)
+
+    def patch(owner, name, wrapper):
+        original = owner.__dict__[name]
+        patched.append((owner, name, original))
+        setattr(owner, name, wrapper(original))
+
+    def counting(field):
+        def wrapper(method):
+            @wraps(method)
+            def counted(*args, **kwargs):
+                metrics._bump(field)
+                return method(*args, **kwargs)
+            return counted
+        return wrapper
+
+    def timed(label):
+        def wrapper(method):
+            @wraps(method)
+            def round_method(self, *args, **kwargs):
+                if metrics._current is not None: return method(self, *args, **kwargs)
+                stats = metrics.rounds.setdefault(label, dict.fromkeys(("calls",) + _FIELDS, 0))
+                stats["calls"] += 1
+                metrics._current = label
+                start = time.perf_counter()
+                try:
+                    result = method(self, *args, **kwargs)
+                    if label in _SENDING: stats["bytes_out"] += wire_size(result, self.group)
+                    return result
+                finally:
+                    stats["wall_s"] += time.perf_counter() - start
+                    metrics._current = None
+            return round_method
+        return wrapper
+
+    for cls in (ModPGroup, SafePrimeGroup, ECGroup):  # 子类重写的方法也要单独插桩
+        for name, field in (("exp", "modexp"), ("hash_to_group", "hash_to_group")):
+            if name in cls.__dict__: patch(cls, name, counting(field))
+    patch(paillier.PaillierPublicKey, "encrypt", counting("he_encrypt"))
+    patch(PaillierRandomPool, "encrypt", counting("he_encrypt"))
+    patch(EncryptedNumber, "_add_encrypted", counting("he_add"))
+    patch(paillier.PaillierPrivateKey, "decrypt", counting("he_decrypt"))
+    patch(ElGamalPublicKey, "encrypt", counting("he_encrypt"))
+    patch(ElGamalCiphertext, "__add__", counting("he_add"))
+    patch(ElGamalPrivateKey, "decrypt", counting("he_decrypt"))
+    for cls, names in _ROUNDS.items():
+        for name in names: patch(cls, name, timed(f"{cls.__name__}.{name}"))
+    _active = metrics
+    try:
+        yield metrics
+    finally:
+        for owner, name, original in reversed(patched): setattr(owner, name, original)
+        _active = None
+
+def run_once(backend, client_size, server_size, overlap=0.1, seed=0, workers=None, he="paillier", z_fpr=None):
+    """一次完整协议：P1 有 client_size 个密码，P2 有 server_size 个，其中 overlap 比例重合"""
+    rng = random.Random(seed)
+    common = [f"common-{i}" for i in range(int(min(client_size, server_size) * overlap))]
+    client = set(common) | {f"client-{i}" for i in range(client_size - len(common))}
+    values = {w: rng.randrange(1, 1000) for w in common}
+    server = {(w, values[w]) for w in common} | {(f"server-{i}", rng.randrange(1, 1000)) for i in range(server_size - len(common))}
+
+    setup_start = time.perf_counter()
+    Func.setup(backend=backend)
+    p1 = P1(client, workers=workers)
+    p2 = P2(server, workers=workers, he=he, z_fpr=z_fpr)
+    setup_s = time.perf_counter() - setup_start
+    try:
+        with instrument() as metrics:
+            p2.round1(p1.round1())
+            Z, hash_list = p2.round2()
+            p1.round2(Z, hash_list)
+            result = p2.round3(p1.round3())
+    finally:  # 每次运行结束都关闭 workers 启动的进程池
+        p1.close_parallel_exp()
+        p2.close_parallel_exp()
+    if result != sum(values.values()): raise AssertionError(f"协议结果错误: {result} != {sum(values.values())}")
+    return dict(metrics.report(), setup_s=setup_s)
+
+def sweep(sizes, backends, server_size=None, **kwargs):
+    results = []
+    for backend in backends:
+        for n in sizes:
+            report = run_once(backend, n, server_size or n, **kwargs)
+            report.update(backend=backend, he=kwargs.get("he", "paillier"), z_fpr=kwargs.get("z_fpr"), client_size=n, server_size=server_size or n)
+            results.append(report)
+            totals = report["totals"]
+            print(f"{backend:<6}{n:>9}{totals['wall_s']:>10.3f}{totals['modexp']:>10}"
+                  f"{totals['he_encrypt'] + totals['he_add'] + totals['he_decrypt']:>10}"
+                  f"{totals['bytes_out']:>14}", flush=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Password Checkup 协议基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="集合大小，可到 1000000")
+    parser.add_argument("--backends", nargs="+", default=["modp", "ec"], choices=("modp", "modp-random", "ec"))
+    parser.add_argument("--server-size", type=int, default=None, help="P2 集合大小，默认与 P1 相同")
+    parser.add_argument("--overlap", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--z-fpr", type=float, default=None, help="Z 以该误判率的 Bloom 过滤器发送")
+    parser.add_argument("--he", default="paillier", choices=("paillier", "elgamal"), help="加法同态加密方案")
+    parser.add_argument("--json", help="结果写入该 JSON 文件")
+    args = parser.parse_args()
+
+    print(f"{'后端':<6}{'集合大小':>9}{'总耗时s':>10}{'求幂':>10}{'同态运算':>10}{'传输字节':>14}")
+    results = sweep(args.sizes, args.backends, args.server_size, overlap=args.overlap, workers=args.workers, he=args.he, z_fpr=args.z_fpr)
+    if args.json:
+        report = {"meta": {"python": sys.version.split()[0], "platform": platform.platform(),
+                           "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+                  "results": results}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,373 @@
+import argparse
+import asyncio
+import collections
+import hashlib
+import importlib.util
+import itertools
+import json
+import os
+import random
+import struct
+import time
+
+from phe import paillier
+from phe.paillier import EncryptedNumber
+
+from group import group_params, group_from_params
+from bucket import encode_prefixes, decode_prefixes
+from zfilter import BloomFilter
+from ec_elgamal import ElGamalPublicKey, ElGamalCiphertext, CIPHERTEXT_SIZE, encode_point, decode_point
+
+# 文件名含空格，不能直接 import
+_spec = importlib.util.spec_from_file_location("goole_password", os.path.join(os.path.dirname(os.path.abspath(__file__)), "goole password.py"))
+goole_password = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(goole_password)
+P1, P2 = goole_password.P1, goole_password.P2
+
+# ==================== [ 网络版 Password Checkup ] ====================
+# 帧格式: 4 字节大端长度 + 类型(1) + 负载
+#   HELLO  (服务器 -> 客户端)  JSON: 群参数与同态加密公钥 (Paillier 的 n 或 ElGamal 的 Y)；分桶模式下附带 prefix_bits
+#   PREFIX (客户端 -> 服务器)  分桶模式下客户端的桶号列表，每个 4 字节
+#   CHUNK                       count(4) ‖ count 个定长记录
+#   END                         一轮数据发送完毕
+#   FILTER (服务器 -> 客户端)  P2 设置 z_fpr 时代替 Z 的 CHUNK* END，内容为 zfilter.BloomFilter.to_bytes()
+#   SUM    (客户端 -> 服务器)  flag(1) ‖ 密文，flag=0 表示交集为空；
+#                               HELLO 含 reveal 时改为 CHUNK 格式的命中密文记录 (原样转发)，由服务器核对后自行求和
+# 密文定长编码：Paillier 为 n² 字节宽的整数 ‖ exponent(4)，ElGamal 为两个 33 字节压缩点
+#   RESULT (服务器 -> 客户端)  交集求和结果 (reveal=False 时为空)
+# reveal 的泄露：服务器只能核对 SUM 中的密文都是本会话第二轮发出的，无法核对它们恰好是交集。
+#   客户端可以只提交其中任意子集，从而得知交集中单个条目的价值，或某条不在交集中的记录的价值 (不知道对应哪个密码)。
+#   ERROR                       UTF-8 错误信息
+# 流程: HELLO; [客户端 PREFIX;] 客户端 CHUNK* END (H(w)^k1); 服务器 CHUNK* END (Z)，再 CHUNK* END ((H(w')^k2, Enc(t)));
+#       客户端 SUM; 服务器 RESULT。
+# 服务器自身的密码集合按块流式计算和发送，内存只与块大小和客户端集合大小有关；
+# 客户端在收到每块 (H(w')^k2, Enc(t)) 后立即求 k1 次幂并累加，不保存整轮数据。
+
+MSG_HELLO, MSG_CHUNK, MSG_END, MSG_SUM, MSG_RESULT, MSG_ERROR, MSG_PREFIX, MSG_FILTER = range(1, 9)
+_LENGTH = struct.Struct(">I")
+_COUNT = struct.Struct(">I")
+_EXPONENT = struct.Struct(">i")
+MAX_FRAME = 16 << 20
+MAX_CLIENT_ITEMS = 1 << 20  # 单个会话中客户端集合的上限
+
+async def read_message(reader):
+    length, = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    if length == 0 or length > MAX_FRAME: raise ValueError("帧长度非法")
+    frame = await reader.readexactly(length)
+    return frame[0], frame[1:]
+
+async def write_message(writer, kind, body=b''):
+    writer.write(_LENGTH.pack(len(body) + 1) + bytes([kind]) + body)
+    await writer.drain()  # 对端处理不过来时在此等待，限制缓冲区大小
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk: return
+        yield chunk
+
+def _pack_records(records, width):
+    body = b''.join(records)
+    if len(body) != len(records) * width: raise ValueError("记录长度不一致")
+    return _COUNT.pack(len(records)) + body
+
+def _unpack_records(body, width):
+    count, = _COUNT.unpack_from(body)
+    if count > MAX_CLIENT_ITEMS or len(body) != _COUNT.size + count * width: raise ValueError("CHUNK 长度非法")
+    return [body[_COUNT.size + i * width:_COUNT.size + (i + 1) * width] for i in range(count)]
+
+def he_params(public_key): # HELLO 中的加法同态公钥
+    if isinstance(public_key, ElGamalPublicKey): return {"he": "elgamal", "y": encode_point(public_key.y).hex()}
+    return {"he": "paillier", "n": format(public_key.n, "x")}
+
+def he_from_params(params):
+    if params["he"] == "elgamal": return ElGamalPublicKey(decode_point(bytes.fromhex(params["y"])))
+    if params["he"] == "paillier": return paillier.PaillierPublicKey(int(params["n"], 16))
+    raise ValueError(f"未知的同态加密方案: {params['he']}")
+
+def ciphertext_size(public_key): # 定长密文编码的字节数
+    if isinstance(public_key, ElGamalPublicKey): return CIPHERTEXT_SIZE
+    return (public_key.nsquare.bit_length() + 7) // 8 + _EXPONENT.size  # Paillier 密文 ‖ exponent
+
+def encode_ciphertext(c, public_key):
+    if isinstance(c, ElGamalCiphertext): return c.to_bytes()
+    return c.ciphertext().to_bytes(ciphertext_size(public_key) - _EXPONENT.size, 'big') + _EXPONENT.pack(c.exponent)
+
+def decode_ciphertext(public_key, data):
+    if isinstance(public_key, ElGamalPublicKey): return ElGamalCiphertext.from_bytes(public_key, data)
+    width = len(data) - _EXPONENT.size
+    return EncryptedNumber(public_key, int.from_bytes(data[:width], 'big'), _EXPONENT.unpack_from(data, width)[0])
+
+def _ciphertext_digest(data): # reveal 模式下记录本会话发出的密文
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+class CheckupServer:
+    """P2 (泄露库持有方)：k2 与 Paillier 密钥在所有会话间共享，会话状态保存在 _session 的局部变量中
+    reveal=True 时把求和结果回传给客户端。为避免成为解密预言机，此时客户端必须提交第二轮收到的密文记录本身，
+    服务器核对后自行求和；但客户端仍可只提交其中的子集，得知单条记录的价值 (见文件开头的说明)，默认关闭"""
+    def __init__(self, p2, chunk_size=256, reveal=False):
+        self.p2 = p2
+        self.group = p2.group
+        self.chunk_size = chunk_size
+        self.reveal = reveal
+        self.ct_size = ciphertext_size(p2.pk)
+        self.sessions = 0
+        self.results = []
+        self._server = None
+        self._connections = set()
+        self._session_keys = collections.Counter()  # 进行中的会话使用的 k2 -> 会话数
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        if path is not None:
+            if os.path.exists(path): os.unlink(path)
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self, **kwargs):
+        await self.start(**kwargs)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        for task in list(self._connections): task.cancel()
+        await self._server.wait_closed()
+
+    # 以下在线程池中运行，避免模幂和加密阻塞事件循环；P2 设置了 workers 时再分发到进程池
+    def _blind_chunk(self, elements, key): # (H(w)^k1)^k2
+        values = [self.group.decode(e) for e in elements]
+        if self.p2.workers: values = self.p2.parallel_exp(key).exp(values)
+        else: values = [self.p2.exp_mod(x, key) for x in values]
+        return [self.group.encode(x) for x in values]
+
+    def _own_chunk(self, items, key, precomputed): # (H(w')^k2, Enc(t))，块内打乱；precomputed 时 items 已是 (编码, t)
+        if precomputed: blinded = [e for e, _ in items]
+        elif self.p2.workers: blinded = [self.group.encode(h) for h in self.p2.parallel_exp(key).hash_exp([w for w, _ in items])]
+        else: blinded = [self.group.encode(self.p2.exp_mod(self.p2.hash_password(w), key)) for w, _ in items]
+        records = [h + encode_ciphertext(self.p2._encrypt_value(t), self.p2.pk)
+                   for h, (_, t) in zip(blinded, items)]
+        random.shuffle(records)
+        return records
+
+    def _sum_records(self, ciphertexts, sent): # reveal 模式：只接受本会话第二轮发出且互不重复的密文
+        digests = [_ciphertext_digest(c) for c in ciphertexts]
+        if len(set(digests)) != len(digests) or not sent.issuperset(digests):
+            raise ValueError("SUM 只能由本会话第二轮发出的密文组成")
+        if not ciphertexts: return 0
+        values = [decode_ciphertext(self.p2.pk, c) for c in ciphertexts]
+        return self.p2.round3(sum(values[1:], values[0]))
+
+    async def _handle(self, reader, writer):
+        self._connections.add(asyncio.current_task())
+        try:
+            await self._session(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass  # 客户端断开或服务器关闭
+        except Exception as exc:
+            try: await write_message(writer, MSG_ERROR, str(exc).encode())
+            except ConnectionError: pass
+        finally:
+            self._connections.discard(asyncio.current_task())
+            writer.close()
+
+    async def _session(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        hello = dict(group_params(self.group), **he_params(self.p2.pk), chunk_size=self.chunk_size)
+        if self.reveal: hello["reveal"] = True
+        key, candidates, buckets = self.p2.k2, self.p2.password, self.p2.buckets
+        db = self.p2.db
+        if db is not None:  # 预计算库：整个会话使用同一个快照 (含 k2)
+            candidates = view = db.snapshot()
+            key = view.key
+            buckets = view if db.prefix_bits else None
+            if buckets is not None: hello["prefix_bits"] = db.prefix_bits
+        elif buckets is not None:
+            hello["prefix_bits"] = buckets.prefix_bits
+        await write_message(writer, MSG_HELLO, json.dumps(hello).encode())
+        self._session_keys[key] += 1
+        try:
+            await self._exchange(reader, writer, key, candidates, buckets, db is not None)
+        finally:
+            self._session_keys[key] -= 1
+            if not self._session_keys[key]: del self._session_keys[key]
+            if self.p2.workers and db is not None:  # 轮换后旧 k2 的会话都已结束时关闭其进程池
+                keep = set(self._session_keys) | {db.snapshot().key}
+                await loop.run_in_executor(None, self.p2.close_parallel_exp, keep)
+
+    async def _exchange(self, reader, writer, key, candidates, buckets, precomputed):
+        loop = asyncio.get_running_loop()
+        if buckets is not None:  # 分桶模式：只处理客户端所报桶内的条目
+            kind, body = await read_message(reader)
+            if kind != MSG_PREFIX: raise ValueError("分桶模式下期望 PREFIX")
+            prefixes = decode_prefixes(body)
+            if len(prefixes) > MAX_CLIENT_ITEMS: raise ValueError("前缀过多")
+            candidates = buckets.select(prefixes)
+
+        Z = []  # 第一轮：边收边计算 (H(w)^k1)^k2
+        while True:
+            kind, body = await read_message(reader)
+            if kind == MSG_END: break
+            if kind != MSG_CHUNK: raise ValueError("第一轮期望 CHUNK")
+            Z.extend(await loop.run_in_executor(None, self._blind_chunk, _unpack_records(body, self.group.element_size), key))
+            if len(Z) > MAX_CLIENT_ITEMS: raise ValueError("客户端集合过大")
+
+        if self.p2.z_fpr is not None:  # 第二轮：Z 以 Bloom 过滤器一次发送
+            bloom = await loop.run_in_executor(None, BloomFilter.build, Z, self.p2.z_fpr)
+            await write_message(writer, MSG_FILTER, bloom.to_bytes())
+        else:  # 或整体打乱后分块发送
+            random.shuffle(Z)
+            for chunk in _chunks(Z, self.chunk_size):
+                await write_message(writer, MSG_CHUNK, _pack_records(chunk, self.group.element_size))
+            await write_message(writer, MSG_END)
+        del Z
+
+        width = self.group.element_size + self.ct_size
+        sent = set()  # reveal 模式下本会话发出的密文摘要
+        for items in _chunks(candidates, self.chunk_size):  # 自身集合流式发送
+            records = await loop.run_in_executor(None, self._own_chunk, items, key, precomputed)
+            if self.reveal: sent.update(_ciphertext_digest(r[self.group.element_size:]) for r in records)
+            await write_message(writer, MSG_CHUNK, _pack_records(records, width))
+        await write_message(writer, MSG_END)
+
+        kind, body = await read_message(reader)  # 第三轮
+        if kind != MSG_SUM: raise ValueError("第三轮期望 SUM")
+        if self.reveal:
+            total = await loop.run_in_executor(None, self._sum_records, _unpack_records(body, self.ct_size), sent)
+        elif body[:1] == b'\x00':
+            total = 0
+        else:
+            total = self.p2.round3(decode_ciphertext(self.p2.pk, body[1:]))
+        self.sessions += 1
+        self.results.append(total)
+        await write_message(writer, MSG_RESULT, str(total).encode() if self.reveal else b'')
+
+class CheckupClient:
+    """P1 (用户)：群参数与 Paillier 公钥来自服务器的 HELLO"""
+    def __init__(self, password, chunk_size=256):
+        self.password = password
+        self.chunk_size = chunk_size
+
+    async def run(self, host="127.0.0.1", port=None, path=None):
+        if path is not None: reader, writer = await asyncio.open_unix_connection(path)
+        else: reader, writer = await asyncio.open_connection(host, port)
+        try:
+            return await self._session(reader, writer)
+        finally:
+            writer.close()
+
+    async def _expect(self, reader, *kinds):
+        kind, body = await read_message(reader)
+        if kind == MSG_ERROR: raise RuntimeError(f"服务器错误: {body.decode()}")
+        if kind not in kinds: raise ValueError(f"意外的消息类型 {kind}")
+        return kind, body
+
+    async def _session(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        _, body = await self._expect(reader, MSG_HELLO)
+        hello = json.loads(body)
+        group = group_from_params(hello)
+        public_key = he_from_params(hello)
+        ct_size = ciphertext_size(public_key)
+        p1 = P1(self.password, group=group)
+        if "prefix_bits" in hello:
+            await write_message(writer, MSG_PREFIX, encode_prefixes(p1.prefixes(hello["prefix_bits"])))
+
+        passwords = list(self.password)
+        random.shuffle(passwords)  # 与 P1.round1 一样打乱顺序
+        for chunk in _chunks(passwords, self.chunk_size):
+            blinded = await loop.run_in_executor(None, lambda c=chunk: [p1.exp_mod(p1.hash_password(w), p1.k1) for w in c])
+            await write_message(writer, MSG_CHUNK, _pack_records([group.encode(x) for x in blinded], group.element_size))
+        await write_message(writer, MSG_END)
+
+        Z = set()  # 第二轮：Z 只用于成员判断，按字节串保存
+        kind, body = await self._expect(reader, MSG_CHUNK, MSG_END, MSG_FILTER)
+        if kind == MSG_FILTER:
+            Z = BloomFilter.from_bytes(body)
+        while kind == MSG_CHUNK:
+            Z.update(_unpack_records(body, group.element_size))
+            kind, body = await self._expect(reader, MSG_CHUNK, MSG_END)
+
+        width = group.element_size + ct_size
+        reveal = hello.get("reveal", False)
+        matched_records = []  # reveal 模式下原样转发命中的密文
+        total = None  # 逐块求 k1 次幂并累加，不保存整轮数据
+        while True:
+            kind, body = await self._expect(reader, MSG_CHUNK, MSG_END)
+            if kind == MSG_END: break
+            records = _unpack_records(body, width)
+            matched = await loop.run_in_executor(None, self._match_chunk, p1, group, Z, records)
+            if reveal:
+                matched_records.extend(matched)
+                continue
+            for data in matched:
+                c = decode_ciphertext(public_key, data)
+                total = c if total is None else total + c
+
+        if reveal: await write_message(writer, MSG_SUM, _pack_records(matched_records, ct_size))
+        elif total is None: await write_message(writer, MSG_SUM, b'\x00')
+        else: await write_message(writer, MSG_SUM, b'\x01' + encode_ciphertext(total, public_key))
+        _, body = await self._expect(reader, MSG_RESULT)
+        return int(body) if body else None
+
+    @staticmethod
+    def _match_chunk(p1, group, Z, records): # 返回 (H(w')^k2)^k1 落在 Z 中的密文记录
+        size = group.element_size
+        blinded = [group.encode(p1.exp_mod(group.decode(r[:size]), p1.k1)) for r in records]
+        hits = Z.contains_many(blinded) if isinstance(Z, BloomFilter) else [b in Z for b in blinded]
+        return [r[size:] for r, hit in zip(records, hits) if hit]
+
+async def _demo(backend, clients, prefix_bits=None, he="paillier", z_fpr=None):
+    goole_password.Func.setup(backend=backend)
+    p2 = P2(he=he, z_fpr=z_fpr)
+    if prefix_bits is not None: p2.build_buckets(prefix_bits)
+    server = CheckupServer(p2, reveal=True)
+    host, port = (await server.start())[:2]
+    server_set = dict(p2.password)
+    sets = [{"让我们荡起双桨", "心想事成", f"client-{i}"} if i % 2 == 0 else {f"client-{i}"} for i in range(clients)]
+
+    start = time.time()
+    results = await asyncio.gather(*(CheckupClient(s).run(host, port) for s in sets))
+    end = time.time()
+    expected = [sum(server_set.get(w, 0) for w in s) for s in sets]
+    print(f"[{backend}, {he}{'' if prefix_bits is None else f', 前缀 {prefix_bits} 位'}{'' if z_fpr is None else f', Z 过滤器 fpr={z_fpr:g}'}] {clients} 个并发会话: {end - start:.3f} 秒，结果 {results}，正确: {results == expected}")
+    await server.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="网络版 Password Checkup (TCP 或 Unix socket)")
+    sub = parser.add_subparsers(dest="command")
+    for name in ("server", "client"):
+        p = sub.add_parser(name)
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=9000)
+        p.add_argument("--unix", help="使用 Unix socket 路径代替 TCP")
+        p.add_argument("--chunk-size", type=int, default=256)
+    sub.choices["server"].add_argument("--backend", default="ec", choices=("modp", "modp-random", "ec"))
+    sub.choices["server"].add_argument("--bits", type=int, default=2048, help="modp 群的位数")
+    sub.choices["server"].add_argument("--workers", type=int, default=None)
+    sub.choices["server"].add_argument("--prefix-bits", type=int, default=None, help="启用分桶模式")
+    sub.choices["server"].add_argument("--z-fpr", type=float, default=None, help="以该误判率的 Bloom 过滤器发送 Z")
+    sub.choices["server"].add_argument("--he", default="paillier", choices=("paillier", "elgamal"), help="加法同态加密方案")
+    sub.choices["server"].add_argument("--reveal", action="store_true", help="把求和结果回传给客户端 (会泄露单条记录的价值，见说明)")
+    sub.choices["client"].add_argument("passwords", nargs="+")
+    parser.add_argument("--clients", type=int, default=4, help="演示中的并发客户端数")
+    args = parser.parse_args()
+
+    if args.command == "server":
+        goole_password.Func.setup(args.bits, backend=args.backend)
+        p2 = P2(workers=args.workers, he=args.he, z_fpr=args.z_fpr)
+        if args.prefix_bits is not None: p2.build_buckets(args.prefix_bits)
+        server = CheckupServer(p2, args.chunk_size, reveal=args.reveal)
+        print(f"监听 {args.unix or f'{args.host}:{args.port}'}，群后端 {args.backend}")
+        asyncio.run(server.serve_forever(host=args.host, port=args.port, path=args.unix))
+    elif args.command == "client":
+        client = CheckupClient(set(args.passwords), args.chunk_size)
+        print("交集求和:", asyncio.run(client.run(args.host, args.port, args.unix)))
+    else:
+        for backend in ("modp", "ec"):
+            asyncio.run(_demo(backend, args.clients))
+        asyncio.run(_demo("ec", args.clients, prefix_bits=2))
+        asyncio.run(_demo("ec", args.clients, he="elgamal"))
+        asyncio.run(_demo("modp", args.clients, he="elgamal", z_fpr=1e-6))
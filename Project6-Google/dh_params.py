@@ -0,0 +1,104 @@
+import json
+import os
+import random
+import time
+
+from arith import powmod
+
+# RFC 3526 MODP 群：p = 2^n - 2^(n-64) - 1 + 2^64 · (⌊2^(n-130) · π⌋ + k)，生成元 g = 2。
+# p 与 q = (p-1)/2 均为素数 (安全素数)。这里不抄写几百位的十六进制常量，而是用 Machin 公式
+# 按整数定点运算求出 π 的前若干位，再代入上式，并用 Miller-Rabin 检验 p 与 q。
+# 检验过的参数写入磁盘缓存；缓存可被改写，读取时 RFC 群与重新计算的 p 比对，随机素数重新做素性检验。
+
+RFC3526_OFFSETS = {1536: 741804, 2048: 124476, 3072: 1690314, 4096: 240904}
+DEFAULT_CACHE = os.environ.get("PC_PARAMS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "password-checkup", "params.json"))
+
+def _arctan_inv(x, one): # arctan(1/x) · one，one 为定点数的 1
+    power = total = one // x
+    x2 = x * x
+    n, sign = 3, -1
+    while power:
+        power //= x2
+        total += sign * (power // n)
+        n += 2
+        sign = -sign
+    return total
+
+def pi_fixed(bits): # ⌊π · 2^bits⌋ (Machin: π = 16·arctan(1/5) - 4·arctan(1/239))
+    guard = 32  # 保护位，吸收截断误差
+    one = 1 << (bits + guard)
+    return (16 * _arctan_inv(5, one) - 4 * _arctan_inv(239, one)) >> guard
+
+def rfc3526_prime(bits):
+    if bits not in RFC3526_OFFSETS: raise ValueError(f"RFC 3526 没有 {bits} 位的群，可选 {sorted(RFC3526_OFFSETS)}")
+    return 2 ** bits - 2 ** (bits - 64) - 1 + 2 ** 64 * (pi_fixed(bits - 130) + RFC3526_OFFSETS[bits])
+
+def is_probable_prime(n, rounds=40):
+    if n < 2: return False
+    for small in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % small == 0: return n == small
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    rng = random.SystemRandom()
+    for _ in range(rounds):
+        x = powmod(rng.randrange(2, n - 1), d, n)
+        if x in (1, n - 1): continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1: break
+        else:
+            return False
+    return True
+
+def is_safe_prime(p):
+    return is_probable_prime((p - 1) // 2) and is_probable_prime(p)
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _store_cache(path, cache):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, path)
+
+def cached_param(name, compute, verify, cache_path=DEFAULT_CACHE, check=None):
+    """读取缓存中的参数 name；缺失或未通过 check 时 compute() 生成、verify() 检验后写入缓存。
+    缓存文件可被改写，check 默认为 verify，即读取的值同样要检验。cache_path=None 不使用缓存"""
+    check = verify if check is None else check
+    cache = _load_cache(cache_path) if cache_path else {}
+    if name in cache:
+        try: value = int(cache[name], 16)
+        except (TypeError, ValueError): value = None
+        if value is not None and check(value): return value
+    value = compute()
+    if not verify(value): raise ValueError(f"参数 {name} 未通过检验")
+    if cache_path:
+        cache = _load_cache(cache_path)
+        cache[name] = format(value, "x")
+        try: _store_cache(cache_path, cache)
+        except OSError: pass  # 缓存目录不可写时只是每次重新计算
+    return value
+
+def load_rfc3526_prime(bits, cache_path=DEFAULT_CACHE):
+    """p 每次按定义重新计算 (毫秒级)，缓存只在与之相同时用来跳过安全素数检验"""
+    p = rfc3526_prime(bits)
+    return cached_param(f"rfc3526-{bits}", lambda: p, is_safe_prime, cache_path, check=lambda value: value == p)
+
+if __name__ == "__main__":
+    for bits in sorted(RFC3526_OFFSETS):
+        start = time.time()
+        p = rfc3526_prime(bits)
+        computed = time.time() - start
+        start = time.time()
+        safe = is_safe_prime(p)
+        verified = time.time() - start
+        print(f"{bits} 位: 计算 {computed * 1000:.1f} 毫秒, 安全素数检验 {verified:.2f} 秒: {safe}")
+        print(f"  {format(p, 'X')[:32]}...{format(p, 'X')[-32:]}")
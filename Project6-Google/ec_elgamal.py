@@ -0,0 +1,162 @@
+import os
+import struct
+import time
+
+from group import ECGroup
+from dh_params import DEFAULT_CACHE
+
+# 椭圆曲线上的指数 ElGamal：Enc(m) = (r·G, m·G + r·Y)，两个密文逐点相加即得 Enc(m1 + m2)。
+# 解密先算 M = C2 - x·C1 = m·G，再用小步大步 (BSGS) 求 m：
+#   小步表保存 j·G (0 <= j < 2^baby_bits) 的 x 坐标低 64 位 -> (j, y 的奇偶)，
+#   大步依次检查 M - i·2^baby_bits·G，找到后 m = i·2^baby_bits + j。
+# m 受 max_value 限制，适用于 Password Checkup 中较小的价值之和；小步表写入磁盘缓存，启动时直接加载。
+# 与 Paillier (phe 默认 3072 位 n，密文 768 字节) 相比，密文只有 2 个 33 字节的压缩点。
+
+CURVE = ECGroup()
+POINT_SIZE = CURVE.element_size
+CIPHERTEXT_SIZE = 2 * POINT_SIZE
+_TABLE_HEADER = struct.Struct(">4sBI")
+_TABLE_RECORD = struct.Struct(">QI")
+_TABLE_MAGIC = b"BSGS"
+_tables = {}  # baby_bits -> DiscreteLogTable，同一进程内共享
+
+def _neg(pt):
+    return None if pt is None else (pt[0], -pt[1] % CURVE.P)
+
+def encode_point(pt): # 无穷远点编码为 33 个零字节
+    return bytes(POINT_SIZE) if pt is None else CURVE.encode(pt)
+
+def decode_point(data):
+    return None if data == bytes(POINT_SIZE) else CURVE.decode(data)
+
+class DiscreteLogTable:
+    def __init__(self, baby_bits=16, path=None):
+        self.baby_bits = baby_bits
+        self.baby = 1 << baby_bits
+        self.path = path or os.path.join(os.path.dirname(DEFAULT_CACHE), f"bsgs-sm2-{baby_bits}.bin")
+        self.table = self._load() or self._build()
+        self.giant = _neg(CURVE.exp(CURVE.G, self.baby))  # -2^baby_bits·G
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < _TABLE_HEADER.size: return None  # 空文件或写入中断，重建
+        magic, bits, count = _TABLE_HEADER.unpack_from(data)
+        if magic != _TABLE_MAGIC or bits != self.baby_bits or len(data) != _TABLE_HEADER.size + count * _TABLE_RECORD.size:
+            return None
+        return dict(_TABLE_RECORD.iter_unpack(data[_TABLE_HEADER.size:]))
+
+    def _build(self):
+        table = {}
+        pt = CURVE.G
+        for j in range(1, self.baby):  # j = 0 对应无穷远点，单独处理
+            table.setdefault(pt[0] & 0xFFFFFFFFFFFFFFFF, j | (pt[1] & 1) << 31)
+            pt = CURVE.op(pt, CURVE.G)
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(_TABLE_HEADER.pack(_TABLE_MAGIC, self.baby_bits, len(table)))
+                f.write(b''.join(_TABLE_RECORD.pack(k, v) for k, v in table.items()))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # 缓存目录不可写时只是每次重建
+        return table
+
+    def _lookup(self, pt):
+        if pt is None: return 0
+        entry = self.table.get(pt[0] & 0xFFFFFFFFFFFFFFFF)
+        if entry is None or entry >> 31 != pt[1] & 1: return None
+        return entry & 0x7FFFFFFF
+
+    def solve(self, pt, max_value):
+        """求 0 <= m <= max_value 使 m·G = pt，找不到时抛出 ValueError"""
+        target = pt
+        for i in range(max_value // self.baby + 1):
+            j = self._lookup(pt)
+            if j is not None:
+                m = i * self.baby + j
+                if m <= max_value and CURVE.exp(CURVE.G, m) == target: return m  # 排除 64 位截断的偶然碰撞
+            pt = CURVE.op(pt, self.giant)
+        raise ValueError("明文超出 max_value，无法求离散对数")
+
+def get_table(baby_bits=16):
+    if baby_bits not in _tables: _tables[baby_bits] = DiscreteLogTable(baby_bits)
+    return _tables[baby_bits]
+
+class ElGamalCiphertext:
+    def __init__(self, public_key, c1, c2):
+        self.public_key = public_key
+        self.c1, self.c2 = c1, c2
+
+    def __add__(self, other):
+        if isinstance(other, int): other = self.public_key.encrypt(other)
+        if other.public_key != self.public_key: raise ValueError("两个密文的公钥不同")
+        return ElGamalCiphertext(self.public_key, CURVE.op(self.c1, other.c1), CURVE.op(self.c2, other.c2))
+
+    __radd__ = __add__
+
+    def to_bytes(self):
+        return encode_point(self.c1) + encode_point(self.c2)
+
+    @classmethod
+    def from_bytes(cls, public_key, data):
+        if len(data) != CIPHERTEXT_SIZE: raise ValueError("ElGamal 密文长度非法")
+        return cls(public_key, decode_point(data[:POINT_SIZE]), decode_point(data[POINT_SIZE:]))
+
+class ElGamalPublicKey:
+    def __init__(self, y):
+        self.y = y
+
+    def __eq__(self, other):
+        return isinstance(other, ElGamalPublicKey) and self.y == other.y
+
+    def __hash__(self):
+        return hash(self.y)
+
+    def encrypt(self, value):
+        if value < 0: raise ValueError("只支持非负整数")
+        r = CURVE.random_exponent()
+        return ElGamalCiphertext(self, CURVE.exp(CURVE.G, r), CURVE.op(CURVE.exp(CURVE.G, value), CURVE.exp(self.y, r)))
+
+class ElGamalPrivateKey:
+    def __init__(self, public_key, x, max_value=1 << 32, baby_bits=16):
+        self.public_key = public_key
+        self.x = x
+        self.max_value = max_value
+        self.baby_bits = baby_bits
+
+    def decrypt(self, ciphertext):
+        """m·G = C2 - x·C1，再查表求 m"""
+        pt = CURVE.op(ciphertext.c2, _neg(CURVE.exp(ciphertext.c1, self.x)))
+        return get_table(self.baby_bits).solve(pt, self.max_value)
+
+def generate_elgamal_keypair(max_value=1 << 32, baby_bits=16):
+    """与 phe.paillier.generate_paillier_keypair 相同的返回顺序 (公钥, 私钥)"""
+    x = CURVE.random_exponent()
+    public_key = ElGamalPublicKey(CURVE.exp(CURVE.G, x))
+    return public_key, ElGamalPrivateKey(public_key, x, max_value, baby_bits)
+
+
+if __name__ == "__main__":
+    from phe import paillier
+
+    start = time.time()
+    get_table()
+    print(f"加载/建立小步表: {time.time() - start:.3f} 秒")
+    values = list(range(1, 101))
+    for name, keygen in (("Paillier", paillier.generate_paillier_keypair), ("EC ElGamal", generate_elgamal_keypair)):
+        public_key, private_key = keygen()
+        start = time.time()
+        ciphertexts = [public_key.encrypt(v) for v in values]
+        encrypt_time = time.time() - start
+        total = sum(ciphertexts[1:], ciphertexts[0])
+        start = time.time()
+        result = private_key.decrypt(total)
+        decrypt_time = time.time() - start
+        size = CIPHERTEXT_SIZE if name == "EC ElGamal" else (public_key.nsquare.bit_length() + 7) // 8
+        print(f"{name:<11} 加密 {len(values)} 个值 {encrypt_time:.3f} 秒, 解密 {decrypt_time * 1000:.1f} 毫秒, "
+              f"密文 {size} 字节, 同态求和正确: {result == sum(values)}")
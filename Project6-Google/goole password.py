@@ -1,12 +1,22 @@
-import hashlib
 from sympy import randprime
-import secrets
 from Crypto.Util.number import GCD
 import random
+import threading
 from phe import paillier
 
+from group import ModPGroup, SafePrimeGroup, ECGroup
+from dh_params import DEFAULT_CACHE, cached_param, is_probable_prime
+from paillier_pool import PaillierRandomPool
+from parallel import ParallelExp
+from bucket import BucketIndex, bucket_id, choose_prefix_bits
+from ec_elgamal import generate_elgamal_keypair
+from zfilter import BloomFilter
+
 class Func: # 基础函数类
     p = None  # 大素数
+    group = None  # 群后端，见 group.py
+    workers = None  # 并行模幂的进程数，None 表示串行
+    _pexp_lock = threading.Lock()  # parallel_exp 可能在多个会话线程中同时调用
 
     @classmethod
     def _generate_large_random_prime_sympy(cls,bits): #随机生成bit位的大素数
@@ -15,40 +25,58 @@ class Func: # 基础函数类
         return randprime(lower_bound, upper_bound)
     
     @classmethod
-    def setup(cls, bits=1024):  # 设置大素数
-        cls.p = cls._generate_large_random_prime_sympy(bits)
-
-    def exp_mod(self,x, e): # x ** e (mod p)
-        r = 1
-        while e > 0:
-            if e & 1 == 1:
-                r = (r * x) % self.p
-            x = (x * x) % self.p
-            e >>= 1
-        return r
+    def setup(cls, bits=2048, backend="modp", cache_path=DEFAULT_CACHE):
+        """选择群后端：
+        modp        RFC 3526 安全素数群 (bits 可选 1536/2048/3072/4096)，在 q 阶子群中计算
+        modp-random 每次随机生成 bits 位素数 (原实现)，cache_path 非空时生成的素数写入缓存并复用
+        ec          SM2 曲线"""
+        if backend == "modp":
+            cls.group = SafePrimeGroup(bits, cache_path)
+            cls.p = cls.group.p
+        elif backend == "modp-random":
+            cls.p = cached_param(f"random-prime-{bits}", lambda: cls._generate_large_random_prime_sympy(bits),
+                                 is_probable_prime, cache_path)
+            cls.group = ModPGroup(cls.p)
+        elif backend == "ec":
+            cls.p = None
+            cls.group = ECGroup()
+        else:
+            raise ValueError(f"未知的群后端: {backend}")
+
+    def exp_mod(self,x, e): # x ** e，由群后端计算
+        return self.group.exp(x, e)
+
+    def parallel_exp(self, k): # 绑定指数 k 的常驻进程池；按指数分别保存，k2 轮换期间新旧密钥的会话可同时使用
+        with Func._pexp_lock:
+            pools = self.__dict__.setdefault("_pexps", {})
+            if k not in pools: pools[k] = ParallelExp(self.group, k, self.workers)
+            return pools[k]
+
+    def close_parallel_exp(self, keep=()): # 关闭指数不在 keep 中的进程池 (轮换完成且旧密钥的会话都结束后调用)
+        with Func._pexp_lock:
+            pools = self.__dict__.get("_pexps", {})
+            stale = [pools.pop(k) for k in list(pools) if k not in keep]
+        for pool in stale: pool.close()
 
     def generate_private_key(self): #生成k1,k2
-        # 生成 [1, p-2] 范围内的随机数
-        if self.p is None:
-            raise ValueError("请先调用 Func.setup() 初始化大素数 p")
-        while True:
-            k = secrets.randbelow(self.p-1) + 1
-            if k < self.p-1:  # 确保 k != p-1
-                return k
+        if self.group is None:
+            raise ValueError("请先调用 Func.setup() 初始化群参数")
+        return self.group.random_exponent()
     
-    def hash_password(self,password): #str->int
-        if self.p is None:
-            raise ValueError("请先调用 Func.setup() 初始化大素数 p")
-        sha256_hex=hashlib.sha256(password.encode()).hexdigest()
-        return int(sha256_hex, 16)%self.p
+    def hash_password(self,password): #str->群元素
+        if self.group is None:
+            raise ValueError("请先调用 Func.setup() 初始化群参数")
+        return self.group.hash_to_group(password)
     
     def hash_passwords(self,passwords): #set->list
-        if self.p is None: 
-            raise ValueError("请先调用 Func.setup() 初始化大素数 p")
+        if self.group is None:
+            raise ValueError("请先调用 Func.setup() 初始化群参数")
         return [self.hash_password(password) for password in passwords]
     
-    def generate_key_pair(self): #生成公私钥对
-        return paillier.generate_paillier_keypair()
+    def generate_key_pair(self, he="paillier"): #生成公私钥对，he 选择加法同态方案：paillier 或 elgamal (椭圆曲线指数 ElGamal)
+        if he == "paillier": return paillier.generate_paillier_keypair()
+        if he == "elgamal": return generate_elgamal_keypair()
+        raise ValueError(f"未知的同态加密方案: {he}")
     
     def encrypt(self, text, public_key): #加法同态加密
         return public_key.encrypt(text)
@@ -57,25 +85,40 @@ class Func: # 基础函数类
         return private_key.decrypt(ciphertext)
 
 class P1(Func):
-    def __init__(self,password={"春天在哪里呀", "小鸟说早早早", "我家住在黄土高坡","小呀么小二郎", "让我们荡起双桨"}): # 密码集合
+    def __init__(self,password={"春天在哪里呀", "小鸟说早早早", "我家住在黄土高坡","小呀么小二郎", "让我们荡起双桨"}, group=None, workers=None): # 密码集合，group 可覆盖 Func.setup 选择的群后端
+        if group is not None: self.group = group
+        if workers is not None: self.workers = workers
         self.password = password
         self.k1= self.generate_private_key()
 
     def round1(self):
+        if self.workers:
+            return self.parallel_exp(self.k1).hash_exp(self.password, shuffle=True)
         hash_list= self.hash_passwords(self.password) #求H(wj)^k1
         hash_list = [self.exp_mod(i, self.k1) for i in hash_list]
         random.shuffle(hash_list)
         return hash_list
     
+    def prefixes(self, prefix_bits): # 分桶模式：公开每个密码所在的桶号
+        return {bucket_id(w, prefix_bits) for w in self.password}
+
     def round2(self,Z, hash_list): #接受参数
         self.Z=Z
         self.hash_list=hash_list
     
     def round3(self):
-        P2_pass = [(self.exp_mod(tup[0], self.k1),tup[1]) for tup in self.hash_list]  # 求(H(wj')^k1k2,Enc(tj'))
+        if self.workers:
+            blinded = self.parallel_exp(self.k1).exp([tup[0] for tup in self.hash_list])
+            P2_pass = list(zip(blinded, [tup[1] for tup in self.hash_list]))
+        else:
+            P2_pass = [(self.exp_mod(tup[0], self.k1),tup[1]) for tup in self.hash_list]  # 求(H(wj')^k1k2,Enc(tj'))
+        if isinstance(self.Z, BloomFilter):  # Z 以过滤器形式收到时整批查询
+            hits = self.Z.contains_many([self.group.encode(pair[0]) for pair in P2_pass])
+        else:
+            hits = [pair[0] in self.Z for pair in P2_pass]
         sum=None
-        for pair in P2_pass:
-            if pair[0] in self.Z:
+        for pair, hit in zip(P2_pass, hits):
+            if hit:
                 if sum is None:
                     sum = pair[1]  # 初始化sum
                 else:
@@ -85,20 +128,78 @@ class P1(Func):
 class P2(Func):
     def __init__(self,password={("晚安，世界",10),("你好，早安",50), ("晴空万里",100),("海阔天空",160), 
                                  ("心想事成",520),  # 新增一个 P1 中有的密码
-                                 ("让我们荡起双桨", 200)}): # 密码集合和用户价值
+                                 ("让我们荡起双桨", 200)}, group=None, workers=None, he="paillier", z_fpr=None): # 密码集合和用户价值
+        if group is not None: self.group = group
+        if workers is not None: self.workers = workers
         self.password = password
         self.k2= self.generate_private_key()
-        self.pk,self.sk = self.generate_key_pair()  # 生成公私钥对
+        self.he = he
+        self.z_fpr = z_fpr  # 非空时 Z 以该误判率的 Bloom 过滤器发送，见 zfilter.py
+        self.pk,self.sk = self.generate_key_pair(he)  # 生成公私钥对
+        self.r_pool = None  # Paillier 随机数预计算池，见 precompute_randomness
+        self.buckets = None  # 分桶索引，见 build_buckets
+        self.candidates = self.password  # 本次会话参与计算的条目
+        self.db = None  # 预计算的盲化哈希库，见 attach_db
+
+    def attach_db(self, db): # 使用 blinded_db.BlindedHashDB 中预计算的 H(w)^k2，k2 由库管理
+        self.db = db
+        self.group = db.group
+
+    def build_buckets(self, prefix_bits=None, bucket_size=64): # 未指定 prefix_bits 时按平均桶大小选取
+        if prefix_bits is None: prefix_bits = choose_prefix_bits(len(self.password), bucket_size)
+        self.buckets = BucketIndex(self.password, prefix_bits)
+        return self.buckets
+
+    def precompute_randomness(self, count=None, background=False, processes=1): # 离线预计算 r^n
+        if self.he != "paillier": raise ValueError("随机数预计算池只用于 Paillier")
+        if self.r_pool is None:
+            self.r_pool = PaillierRandomPool(self.pk, capacity=max(count or len(self.password), 1), processes=processes)
+        if background:
+            self.r_pool.start()
+        else:
+            self.r_pool.precompute(count or len(self.password))
+        return self.r_pool
+
+    def _encrypt_value(self, value): # 有预计算池时在线加密只需一次模乘
+        if self.r_pool is not None:
+            return self.r_pool.encrypt(value)
+        return self.encrypt(value, self.pk)
+
+    def _pack_z(self, Z):
+        if self.z_fpr is None: return set(Z)
+        return BloomFilter.build([self.group.encode(z) for z in Z], self.z_fpr)
 
-    def round1(self, hash_list): #接受参数
+    def round1(self, hash_list, prefixes=None): #接受参数，分桶模式下只处理 P1 所报桶内的条目
         self.hash_list = hash_list
+        if self.db is not None:  # 整个会话使用同一个快照，不受插入和密钥轮换影响
+            view = self.db.snapshot()
+            self.k2 = view.key
+            self.candidates = list(view.select(prefixes) if prefixes is not None and self.db.prefix_bits else view)
+        elif self.buckets is not None and prefixes is not None:
+            self.candidates = list(self.buckets.select(prefixes))
+        else:
+            self.candidates = self.password
 
     def round2(self): #pk包含在密文对象中隐式传递
+        if self.db is not None: # candidates 为 (H(w)^k2 编码, t)，只需计算 Z
+            Z = self.parallel_exp(self.k2).exp(self.hash_list) if self.workers else [self.exp_mod(i, self.k2) for i in self.hash_list]
+            random.shuffle(Z)
+            tmp = [(self.group.decode(e), self._encrypt_value(t)) for e, t in self.candidates]
+            random.shuffle(tmp)
+            return self._pack_z(Z), tmp
+        if self.workers:
+            pexp = self.parallel_exp(self.k2)
+            Z = pexp.exp(self.hash_list, shuffle=True)
+            passwords = list(self.candidates)
+            blinded = pexp.hash_exp([tup[0] for tup in passwords])
+            tmp = [(h, self._encrypt_value(tup[1])) for h, tup in zip(blinded, passwords)]
+            random.shuffle(tmp)
+            return self._pack_z(Z), tmp
         Z=[self.exp_mod(i, self.k2) for i in self.hash_list]
         random.shuffle(Z)
-        tmp = [(self.exp_mod(self.hash_password(tup[0]), self.k2),self.encrypt(tup[1],self.pk)) for tup in self.password] #获取(H(wj')^k2,Enc(tj'))
+        tmp = [(self.exp_mod(self.hash_password(tup[0]), self.k2),self._encrypt_value(tup[1])) for tup in self.candidates] #获取(H(wj')^k2,Enc(tj'))
         random.shuffle(tmp)
-        return set(Z), tmp
+        return self._pack_z(Z), tmp
     
     def round3(self,sum): #接受参数
         if sum is None:
@@ -106,22 +207,32 @@ class P2(Func):
         all_t=self.decrypt(sum,self.sk)  # 解密sum
         return all_t
     
-def test_protocol():
-    Func.setup()
-    p1= P1()
-    p2= P2()
-    hash_list= p1.round1()  # P1的第一轮
-    p2.round1(hash_list)  # P2的第一轮
-    print("第一轮交互完成")
-    Z, hash_list = p2.round2()  # P2的第二轮
-    p1.round2(Z, hash_list)  # P1的第二轮
-    print("第二轮交互完成")
-    sum = p1.round3()  # P1的第三轮
-    all_t = p2.round3(sum)  # P2的第三轮
-    print("交互协议完成")
+def test_protocol(backend="modp", workers=None, prefix_bits=None, he="paillier", z_fpr=None):
+    Func.setup(backend=backend)
+    p1= P1(workers=workers)
+    p2= P2(workers=workers, he=he, z_fpr=z_fpr)
+    prefixes = None
+    if prefix_bits is not None:  # 分桶模式
+        p2.build_buckets(prefix_bits)
+        prefixes = p1.prefixes(prefix_bits)
+    try:
+        hash_list= p1.round1()  # P1的第一轮
+        p2.round1(hash_list, prefixes)  # P2的第一轮
+        print("第一轮交互完成")
+        Z, hash_list = p2.round2()  # P2的第二轮
+        p1.round2(Z, hash_list)  # P1的第二轮
+        print("第二轮交互完成")
+        sum = p1.round3()  # P1的第三轮
+        all_t = p2.round3(sum)  # P2的第三轮
+        print("交互协议完成")
+    finally:  # 关闭 workers 启动的进程池
+        p1.close_parallel_exp()
+        p2.close_parallel_exp()
     return p1.password, p2.password, all_t  # 返回密码和总和
 
 if __name__ == "__main__":
-    passwd1,passwd2,output= test_protocol()
-    print("passwd1为", passwd1, "\npasswd2为", passwd2, "\n输出为", output)
+    for backend in ("modp", "ec"):
+        print(f"===群后端: {backend}===")
+        passwd1,passwd2,output= test_protocol(backend)
+        print("passwd1为", passwd1, "\npasswd2为", passwd2, "\n输出为", output)
 
@@ -0,0 +1,166 @@
+import hashlib
+import secrets
+
+from arith import powmod, invert, mulmod
+from dh_params import load_rfc3526_prime, DEFAULT_CACHE
+
+# 协议使用的群后端：P1、P2 只通过 hash_to_group / exp / random_exponent / encode 访问群元素，
+# 换用不同的群不改变协议的轮次结构。
+#   ModPGroup: 模大素数 p 的乘法群 (原实现，元素 128 字节)
+#   SafePrimeGroup: RFC 3526 安全素数 p = 2q + 1 中 q 阶的二次剩余子群
+#   ECGroup:   SM2 推荐曲线 (素数阶 n，余因子 1)，元素按 33 字节压缩点传输
+
+class ModPGroup:
+    name = "modp"
+
+    def __init__(self, p):
+        self.p = p
+        self.order = p - 1  # Z_p^* 的阶，指数在 [1, p-2] 中选取
+        self.element_size = (p.bit_length() + 7) // 8
+
+    def hash_to_group(self, password): # str->int
+        sha256_hex = hashlib.sha256(password.encode()).hexdigest()
+        return int(sha256_hex, 16) % self.p
+
+    def exp(self, x, e): # x ** e (mod p)，由 arith 后端计算 (有 gmpy2 时用 GMP)
+        return powmod(x, e, self.p)
+
+    def random_exponent(self):
+        while True:
+            k = secrets.randbelow(self.p - 1) + 1
+            if k < self.p - 1:  # 确保 k != p-1
+                return k
+
+    def encode(self, x):
+        return x.to_bytes(self.element_size, 'big')
+
+    def decode(self, data):
+        return int.from_bytes(data, 'big')
+
+def _jacobi(a, n): # Jacobi 符号 (a/n)，n 为奇数
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5): result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3: result = -result
+        a %= n
+    return result if n == 1 else 0
+
+class SafePrimeGroup(ModPGroup):
+    """p = 2q + 1 的二次剩余子群，阶为素数 q；参数固定，启动时无需生成素数"""
+    name = "rfc3526"
+
+    def __init__(self, bits=2048, cache_path=DEFAULT_CACHE):
+        super().__init__(load_rfc3526_prime(bits, cache_path))
+        self.bits = bits
+        self.q = (self.p - 1) // 2
+        self.order = self.q  # 子群阶为素数，任意非零指数都可逆
+
+    def hash_to_group(self, password):
+        """把密码扩展为比 p 长 64 位的哈希 (模 p 的偏差可忽略)，平方后落入 q 阶子群"""
+        data = password.encode()
+        length = (self.p.bit_length() + 64 + 7) // 8
+        stream = b''.join(hashlib.sha256(ctr.to_bytes(4, 'big') + data).digest() for ctr in range((length + 31) // 32))
+        h = int.from_bytes(stream[:length], 'big') % self.p
+        return mulmod(h, h, self.p)
+
+    def random_exponent(self):
+        return secrets.randbelow(self.q - 1) + 1
+
+    def decode(self, data):
+        x = super().decode(data)
+        if not 1 < x < self.p or _jacobi(x, self.p) != 1: raise ValueError("元素不在二次剩余子群中")
+        return x
+
+class ECGroup:
+    """SM2 曲线上的群，点用 (x, y) 元组表示，None 为无穷远点"""
+    name = "sm2"
+    P = 0xFFFFFFFE_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_00000000_FFFFFFFF_FFFFFFFF
+    A = 0xFFFFFFFE_FFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF_00000000_FFFFFFFF_FFFFFFFC
+    B = 0x28E9FA9E_9D9F5E34_4D5A9E4B_CF6509A7_F39789F5_15AB8F92_DDBCBD41_4D940E93
+    N = 0xFFFFFFFE_FFFFFFFF_FFFFFFFF_FFFFFFFF_7203DF6B_21C6052B_53BBF409_39D54123
+    G = (0x32C4AE2C_1F198119_5F990446_6A39C994_8FE30BBF_F2660BE1_715A4589_334C74C7,
+         0xBC3736A2_F4F6779C_59BDCEE3_6B692153_D0A9877C_C62A4740_02DF32E5_2139F0A0)
+    element_size = 33
+
+    def __init__(self):
+        self.order = self.N
+
+    def op(self, p1, p2): # 点加
+        if p1 is None: return p2
+        if p2 is None: return p1
+        P = self.P
+        x1, y1 = p1; x2, y2 = p2
+        if x1 == x2 and (y1 + y2) % P == 0: return None
+        if x1 == x2: m = (3 * x1 * x1 + self.A) * invert(2 * y1, P) % P
+        else: m = (y2 - y1) * invert(x2 - x1, P) % P
+        x3 = (m * m - x1 - x2) % P
+        return (x3, (m * (x1 - x3) - y1) % P)
+
+    def exp(self, x, e): # 标量乘 e·x，4 位 w-NAF
+        e %= self.N
+        if x is None or e == 0: return None
+        table = [x]
+        x2 = self.op(x, x)
+        for _ in range(3): table.append(self.op(table[-1], x2))  # 1x, 3x, 5x, 7x
+        naf = []
+        while e:
+            if e & 1:
+                d = e % 16
+                if d >= 8: d -= 16
+                e -= d
+            else:
+                d = 0
+            naf.append(d)
+            e >>= 1
+        r = None
+        for d in reversed(naf):
+            r = self.op(r, r)
+            if d > 0: r = self.op(r, table[d >> 1])
+            elif d < 0:
+                q = table[-d >> 1]
+                r = self.op(r, (q[0], -q[1] % self.P))
+        return r
+
+    def _sqrt(self, a): # P ≡ 3 (mod 4)
+        y = powmod(a, (self.P + 1) // 4, self.P)
+        return y if y * y % self.P == a % self.P else None
+
+    def hash_to_group(self, password):
+        """try-and-increment：x = SHA256(ctr‖password) mod P，直到 x 落在曲线上，取偶数 y"""
+        data = password.encode()
+        ctr = 0
+        while True:
+            x = int.from_bytes(hashlib.sha256(ctr.to_bytes(4, 'big') + data).digest(), 'big') % self.P
+            y = self._sqrt((x * x * x + self.A * x + self.B) % self.P)
+            if y is not None:
+                return (x, y if y & 1 == 0 else self.P - y)
+            ctr += 1
+
+    def random_exponent(self):
+        return secrets.randbelow(self.N - 1) + 1
+
+    def encode(self, pt):
+        x, y = pt
+        return bytes([2 | (y & 1)]) + x.to_bytes(32, 'big')
+
+    def decode(self, data):
+        if len(data) != 33 or data[0] not in (2, 3): raise ValueError("无效的压缩点编码")
+        x = int.from_bytes(data[1:], 'big')
+        y = self._sqrt((x * x * x + self.A * x + self.B) % self.P)
+        if x >= self.P or y is None: raise ValueError("点不在曲线上")
+        return (x, y if y & 1 == data[0] & 1 else self.P - y)
+
+def group_params(group): # 可 JSON 序列化的群描述，用于握手消息和持久化文件
+    if group.name == "modp": return {"group": "modp", "p": format(group.p, "x")}
+    if group.name == "rfc3526": return {"group": "rfc3526", "bits": group.bits}
+    return {"group": group.name}
+
+def group_from_params(params):
+    if params["group"] == "modp": return ModPGroup(int(params["p"], 16))
+    if params["group"] == "rfc3526": return SafePrimeGroup(params["bits"])
+    if params["group"] == "sm2": return ECGroup()
+    raise ValueError(f"未知的群后端: {params['group']}")
@@ -0,0 +1,124 @@
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from phe import paillier
+from phe.paillier import EncodedNumber, EncryptedNumber
+from phe.util import powmod
+
+# Paillier 加密 Enc(m) = (1 + n·m) · r^n mod n²，其中 r^n 与明文无关，可以离线预计算。
+# 预计算池保存若干 r^n，在线加密只需一次模乘；每个 r^n 只会被取出一次。
+
+def _obfuscators(n, count): # 工作进程中计算 count 个 r^n mod n²
+    nsquare = n * n
+    return [powmod(secrets.randbelow(n - 1) + 1, n, nsquare) for _ in range(count)]  # 装有 gmpy2 时走 GMP
+
+class PaillierRandomPool:
+    def __init__(self, public_key, capacity=4096, low_watermark=None, batch_size=256, processes=1):
+        self.public_key = public_key
+        self.capacity = capacity
+        self.low_watermark = capacity // 4 if low_watermark is None else low_watermark
+        self.batch_size = batch_size
+        self.processes = processes  # 0 表示在后台线程内计算
+        self._values = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._running = False
+        self.generated = self.taken = self.misses = 0
+
+    def _compute(self, count):
+        return _obfuscators(self.public_key.n, count)
+
+    def _store(self, values):
+        with self._lock:
+            self._values.extend(values)
+            self.generated += len(values)
+
+    def precompute(self, count):
+        """同步预计算 count 个 r^n (在预计到来的流量之前调用)"""
+        if self.processes > 1:
+            chunk = max(1, count // self.processes)
+            sizes = [chunk] * (count // chunk) + ([count % chunk] if count % chunk else [])
+            with ProcessPoolExecutor(self.processes) as executor:
+                for values in executor.map(_obfuscators, [self.public_key.n] * len(sizes), sizes):
+                    self._store(values)
+        else:
+            self._store(self._compute(count))
+
+    def start(self):
+        """启动后台补充：数量低于 low_watermark 时补到 capacity"""
+        if self._running: return
+        self._running = True
+        self._wakeup.set()
+        self._thread = threading.Thread(target=self._run, name="paillier-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None: self._thread.join()
+
+    def _run(self):
+        executor = ProcessPoolExecutor(self.processes) if self.processes > 0 else None
+        try:
+            while self._running:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                while self._running and len(self._values) < self.capacity:
+                    count = min(self.batch_size, self.capacity - len(self._values))
+                    if executor is not None:
+                        self._store(executor.submit(_obfuscators, self.public_key.n, count).result())
+                    else:
+                        self._store(self._compute(count))
+        finally:
+            if executor is not None: executor.shutdown()
+
+    def take(self):
+        """取出一个 r^n；池空时当场计算"""
+        with self._lock:
+            value = self._values.popleft() if self._values else None
+            self.taken += 1
+            if len(self._values) <= self.low_watermark: self._wakeup.set()
+        if value is None:
+            self.misses += 1
+            value = self._compute(1)[0]
+        return value
+
+    def encrypt(self, value):
+        """与 public_key.encrypt(value) 结果等价，但只需一次模乘"""
+        pk = self.public_key
+        encoding = EncodedNumber.encode(pk, value)
+        nude = pk.raw_encrypt(encoding.encoding, r_value=1)  # 1^n = 1，不做模幂
+        encrypted = EncryptedNumber(pk, nude * self.take() % pk.nsquare, encoding.exponent)
+        encrypted._EncryptedNumber__is_obfuscated = True  # 已乘以随机的 r^n，序列化时无需再次混淆
+        return encrypted
+
+    def stats(self):
+        return {"available": len(self._values), "generated": self.generated,
+                "taken": self.taken, "misses": self.misses}
+
+
+if __name__ == "__main__":
+    public_key, private_key = paillier.generate_paillier_keypair()
+    values = list(range(200))
+
+    start = time.time()
+    plain = [public_key.encrypt(v) for v in values]
+    end = time.time()
+    print(f"直接加密 {len(values)} 个值: {end - start:.3f} 秒")
+
+    pool = PaillierRandomPool(public_key, capacity=len(values))
+    start = time.time()
+    pool.precompute(len(values))
+    end = time.time()
+    print(f"离线预计算 {len(values)} 个 r^n: {end - start:.3f} 秒")
+    start = time.time()
+    pooled = [pool.encrypt(v) for v in values]
+    end = time.time()
+    print(f"在线加密 {len(values)} 个值: {end - start:.3f} 秒")
+    print(f"解密正确: {[private_key.decrypt(c) for c in pooled] == values}")
+    print(f"同态求和正确: {private_key.decrypt(sum(pooled[1:], pooled[0])) == sum(values)}")
+    print("池状态:", pool.stats())
@@ -0,0 +1,70 @@
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 盲化 H(x)^k 与再盲化 (H(x)^k1)^k2 是彼此独立的大数模幂，按块分给进程池并行计算。
+# 群参数和指数只在工作进程启动时传一次，之后每个块只传输群元素。
+
+_worker_group = None
+_worker_exponent = None
+
+def _init_worker(group, exponent):
+    global _worker_group, _worker_exponent
+    _worker_group, _worker_exponent = group, exponent
+
+def _exp_chunk(values):
+    return [_worker_group.exp(x, _worker_exponent) for x in values]
+
+def _hash_exp_chunk(passwords):
+    return [_worker_group.exp(_worker_group.hash_to_group(w), _worker_exponent) for w in passwords]
+
+def _chunks(values, chunk_size):
+    it = iter(values)
+    while True:
+        chunk = list(itertools.islice(it, chunk_size))
+        if not chunk: return
+        yield chunk
+
+class ParallelExp:
+    """绑定 (群, 指数) 的常驻进程池"""
+    def __init__(self, group, exponent, workers=None, chunk_size=256):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(group, exponent))
+
+    def _run(self, func, values, shuffle):
+        result = list(itertools.chain.from_iterable(self._executor.map(func, _chunks(values, self.chunk_size))))
+        if shuffle: random.shuffle(result)
+        return result
+
+    def exp(self, values, shuffle=False): # [x^k]，shuffle=False 时与输入顺序一致
+        return self._run(_exp_chunk, values, shuffle)
+
+    def hash_exp(self, passwords, shuffle=False): # [H(w)^k]，哈希也在工作进程中完成
+        return self._run(_hash_exp_chunk, passwords, shuffle)
+
+    def close(self):
+        self._executor.shutdown()
+
+
+if __name__ == "__main__":
+    from group import ModPGroup
+    from sympy import randprime
+
+    group = ModPGroup(randprime(2 ** 1023, 2 ** 1024 - 1))
+    k = group.random_exponent()
+    passwords = [f"password-{i}" for i in range(2000)]
+
+    start = time.time()
+    serial = [group.exp(group.hash_to_group(w), k) for w in passwords]
+    end = time.time()
+    print(f"串行 {len(passwords)} 次模幂: {end - start:.3f} 秒")
+
+    pool = ParallelExp(group, k)
+    start = time.time()
+    parallel = pool.hash_exp(passwords)
+    end = time.time()
+    print(f"{pool.workers} 进程并行: {end - start:.3f} 秒，结果一致: {parallel == serial}")
+    pool.close()